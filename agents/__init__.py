@@ -1 +1 @@
-from .summarize_agent import summarize as summarize
\ No newline at end of file
+from .summarize_agent import summarize as summarize, summarize_stream as summarize_stream
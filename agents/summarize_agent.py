@@ -1,4 +1,7 @@
+import asyncio
+import hashlib
 import os
+import re
 import yaml
 from dotenv import load_dotenv
 
@@ -9,6 +12,7 @@ from langfuse import observe, propagate_attributes
 from langfuse.langchain import CallbackHandler
 
 from agents.languages import resolve_language_name
+from agents.tokens import estimate_tokens
 
 
 def load_prompts():
@@ -19,9 +23,22 @@ def load_prompts():
 
 prompts = load_prompts()
 summary_prompt = prompts["SUMMARIZE_PROMPT"]
+chunk_prompt = prompts["SUMMARIZE_CHUNK_PROMPT"]
+# Part of every summary-cache key, so editing the summary prompts retires
+# summaries produced under the old ones.
+prompt_hash = hashlib.sha256((summary_prompt + chunk_prompt).encode("utf-8")).hexdigest()[:16]
 
+# Above this many (estimated) tokens the transcript is summarized map-reduce
+# style: token-budgeted chunks are condensed concurrently, then the partial
+# notes are reduced into the usual SUMMARIZE_PROMPT format. Keeps latency
+# flat-ish for long videos and stays clear of the context window.
+SUMMARY_MAP_REDUCE_TOKENS = int(os.getenv("SUMMARY_MAP_REDUCE_TOKENS", "24000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+model_name = os.getenv("OPENROUTER_SUMMARY_MODEL", "openai/gpt-oss-120b")
 model = ChatOpenAI(
-    model=os.getenv("OPENROUTER_SUMMARY_MODEL", "openai/gpt-oss-120b"),
+    model=model_name,
     base_url="https://openrouter.ai/api/v1",
     api_key=os.getenv("OPENROUTER_API_KEY"),
     extra_body={
@@ -36,15 +53,99 @@ model = ChatOpenAI(
 langfuse_handler = CallbackHandler()
 
 
+def _split_units(text: str, segments: list[str] | None, max_tokens: int) -> list[str]:
+    """Smallest pieces a chunk boundary may fall between: the merge_segments
+    segments when the client sent them, else sentences. Anything still over
+    `max_tokens` (unpunctuated auto-captions) is cut on word boundaries."""
+    units = segments if segments else re.split(r"(?<=[.!?。！？])\s+", text)
+    pieces: list[str] = []
+    for unit in units:
+        if not unit.strip():
+            continue
+        if estimate_tokens(unit) <= max_tokens:
+            pieces.append(unit)
+            continue
+        words = unit.split()
+        step = max(1, max_tokens * 4 // 6)  # ~6 chars per word incl. space
+        pieces.extend(" ".join(words[i : i + step]) for i in range(0, len(words), step))
+    return pieces
+
+
+def _pack_chunks(units: list[str], max_tokens: int) -> list[str]:
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        if current and used + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(unit)
+        used += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+async def _complete(system: str, user: str) -> str:
+    response = await model.ainvoke(
+        [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        config={"callbacks": [langfuse_handler]},
+    )
+    return response.content
+
+
+async def _condense_chunks(text: str, language_name: str, segments: list[str] | None) -> str:
+    """Map step: condense each chunk concurrently; returns the joined notes."""
+    chunks = _pack_chunks(_split_units(text, segments, SUMMARY_CHUNK_TOKENS), SUMMARY_CHUNK_TOKENS)
+    semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+    async def _condense(part: int, chunk: str) -> str:
+        system = chunk_prompt.format(language=language_name, part=part, total=len(chunks))
+        async with semaphore:
+            return await _complete(system, chunk)
+
+    partials = await asyncio.gather(*(_condense(i, c) for i, c in enumerate(chunks, 1)))
+    notes = "\n\n".join(f"Part {i}:\n{p}" for i, p in enumerate(partials, 1))
+    return (
+        "The transcript was too long to send whole. Below are detailed notes on each "
+        "consecutive part of it, in order — summarize the video from them.\n\n" + notes
+    )
+
+
+def needs_map_reduce(text: str) -> bool:
+    return estimate_tokens(text) > SUMMARY_MAP_REDUCE_TOKENS
+
+
 @observe(name="summarize")
-async def summarize(text: str, language: str = "en") -> str:
+async def summarize(text: str, language: str = "en", segments: list[str] | None = None) -> str:
+    language_name = resolve_language_name(language)
+    with propagate_attributes(tags=[f"language:{language}"]):
+        if needs_map_reduce(text):
+            text = await _condense_chunks(text, language_name, segments)
+        return await _complete(summary_prompt.format(language=language_name), text)
+
+
+@observe(name="summarize-stream")
+async def summarize_stream(text: str, language: str = "en", segments: list[str] | None = None):
+    """Like summarize(), but yields markdown deltas as the model produces them.
+
+    In map-reduce mode the map step runs first (not streamed); only the
+    final reduce is streamed.
+    """
     language_name = resolve_language_name(language)
     with propagate_attributes(tags=[f"language:{language}"]):
-        response = await model.ainvoke(
+        if needs_map_reduce(text):
+            text = await _condense_chunks(text, language_name, segments)
+        async for chunk in model.astream(
             [
                 {"role": "system", "content": summary_prompt.format(language=language_name)},
                 {"role": "user", "content": text},
             ],
             config={"callbacks": [langfuse_handler]},
-        )
-    return response.content
+        ):
+            if chunk.content:
+                yield chunk.content
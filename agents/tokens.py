@@ -0,0 +1,4 @@
+def estimate_tokens(text: str) -> int:
+    """Rough token count for sizing LLM batches and chunks (no tokenizer call)."""
+    # ~4 characters per token is close enough for budgeting across languages.
+    return len(text) // 4 + 1
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import re
 import yaml
 from dotenv import load_dotenv
 
@@ -16,9 +18,16 @@ def load_prompts():
 
 prompts = load_prompts()
 translate_prompt = prompts["TRANSLATE_PROMPT"]
+translate_batch_prompt = prompts["TRANSLATE_BATCH_PROMPT"]
+# Part of every translation-memory key, so editing the prompts retires
+# translations produced under the old ones.
+prompt_hash = hashlib.sha256(
+    (translate_prompt + translate_batch_prompt).encode("utf-8")
+).hexdigest()[:16]
 
+model_name = os.getenv("OPENROUTER_TRANSLATE_MODEL", "nvidia/nemotron-3-super-120b-a12b:free")
 model = ChatOpenAI(
-    model=os.getenv("OPENROUTER_TRANSLATE_MODEL", "nvidia/nemotron-3-super-120b-a12b:free"),
+    model=model_name,
     base_url="https://openrouter.ai/api/v1",
     api_key=os.getenv("OPENROUTER_API_KEY"),
     extra_body={
@@ -32,15 +41,159 @@ model = ChatOpenAI(
 
 langfuse_handler = CallbackHandler()
 
+def _translate_messages(text: str, language: str) -> list[dict]:
+    language_name = resolve_language_name(language)
+    return [
+        {"role": "system", "content": translate_prompt},
+        {"role": "user", "content": f"Translate the following to {language_name}:\n\n{text}"},
+    ]
+
+
 @observe(name="translate")
 async def translate(text: str, language: str) -> str:
-    language_name = resolve_language_name(language)
     with propagate_attributes(tags=[f"language:{language}"]):
         response = await model.ainvoke(
-            [
-                {"role": "system", "content": translate_prompt},
-                {"role": "user", "content": f"Translate the following to {language_name}:\n\n{text}"},
-            ],
+            _translate_messages(text, language),
             config={"callbacks": [langfuse_handler]},
         )
     return response.content
+
+
+@observe(name="translate-stream")
+async def translate_stream(text: str, language: str):
+    """Like translate(), but yields text deltas as the model produces them."""
+    with propagate_attributes(tags=[f"language:{language}"]):
+        async for chunk in model.astream(
+            _translate_messages(text, language),
+            config={"callbacks": [langfuse_handler]},
+        ):
+            if chunk.content:
+                yield chunk.content
+
+
+_BATCH_MARKER = re.compile(r"<<<(\d+)>>>")
+# A stream chunk may end part-way through a marker; hold such a tail back.
+_PARTIAL_MARKER_TAIL = re.compile(r"(?:<{1,3}|<<<\d+>{0,2})$")
+
+
+def _format_batch(texts: list[str]) -> str:
+    return "\n".join(f"<<<{i}>>>\n{text}" for i, text in enumerate(texts, 1))
+
+
+def _parse_batch(output: str, expected: int) -> list[str] | None:
+    """Map a batch reply back to its blocks.
+
+    None unless the markers are exactly 1..expected, once each and in
+    order: a repeated or reordered marker means the model lost track of
+    the segments, and the caller falls back to per-segment translation.
+    """
+    parts = _BATCH_MARKER.split(output)
+    if [int(idx) for idx in parts[1::2]] != list(range(1, expected + 1)):
+        return None
+    return [text.strip() for text in parts[2::2]]
+
+
+class _MarkerStream:
+    """Attribute a streamed batch reply to its <<<n>>> blocks as it arrives.
+
+    feed() returns (block number, text delta) pairs. Best effort only: the
+    final _parse_batch result is authoritative.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._block: int | None = None
+        self._block_started = False
+
+    def feed(self, delta: str) -> list[tuple[int, str]]:
+        self._buffer += delta
+        out: list[tuple[int, str]] = []
+        while match := _BATCH_MARKER.search(self._buffer):
+            self._emit(self._buffer[: match.start()], out)
+            self._block = int(match.group(1))
+            self._block_started = False
+            self._buffer = self._buffer[match.end() :]
+        tail = _PARTIAL_MARKER_TAIL.search(self._buffer)
+        cut = tail.start() if tail else len(self._buffer)
+        self._emit(self._buffer[:cut], out)
+        self._buffer = self._buffer[cut:]
+        return out
+
+    def _emit(self, text: str, out: list[tuple[int, str]]) -> None:
+        if self._block is None:
+            return
+        if not self._block_started:
+            text = text.lstrip()
+            self._block_started = bool(text)
+        if text:
+            out.append((self._block, text))
+
+
+async def _translate_one(text: str, language: str, on_delta, index: int) -> str:
+    if on_delta is None:
+        return await translate(text, language)
+    parts: list[str] = []
+    async for delta in translate_stream(text, language):
+        parts.append(delta)
+        on_delta(index, delta)
+    return "".join(parts)
+
+
+@observe(name="translate-batch")
+async def translate_batch(texts: list[str], language: str, on_delta=None) -> list[str]:
+    """Translate several segments in one LLM call, one result per input.
+
+    Segments travel as <<<n>>>-delimited blocks. If the model mangles the
+    markers, the batch is retried segment by segment so outputs can never
+    land on the wrong segment.
+
+    With `on_delta(index, text)`, the reply is streamed and each delta is
+    reported against its index in `texts` as it is generated. Before the
+    per-segment fallback streams a segment again, `on_delta(index, None)`
+    says to discard what was reported for it so far. The returned list
+    stays authoritative.
+    """
+    pending = [i for i, text in enumerate(texts) if text.strip()]
+    results = [""] * len(texts)
+    if not pending:
+        return results
+    if len(pending) == 1:
+        i = pending[0]
+        results[i] = await _translate_one(texts[i], language, on_delta, i)
+        return results
+
+    language_name = resolve_language_name(language)
+    messages = [
+        {"role": "system", "content": f"{translate_prompt}\n{translate_batch_prompt}"},
+        {
+            "role": "user",
+            "content": f"Translate the following to {language_name}:\n\n"
+            + _format_batch([texts[i] for i in pending]),
+        },
+    ]
+    with propagate_attributes(tags=[f"language:{language}"]):
+        if on_delta is None:
+            response = await model.ainvoke(messages, config={"callbacks": [langfuse_handler]})
+            output = response.content
+        else:
+            parts: list[str] = []
+            markers = _MarkerStream()
+            async for chunk in model.astream(messages, config={"callbacks": [langfuse_handler]}):
+                if not chunk.content:
+                    continue
+                parts.append(chunk.content)
+                for block, delta in markers.feed(chunk.content):
+                    if 1 <= block <= len(pending):
+                        on_delta(pending[block - 1], delta)
+            output = "".join(parts)
+    blocks = _parse_batch(output, len(pending))
+    if blocks is None:
+        if on_delta is not None:
+            for i in pending:
+                on_delta(i, None)
+        # Sequential on purpose: the caller's concurrency limit counts this
+        # batch as one slot.
+        blocks = [await _translate_one(texts[i], language, on_delta, i) for i in pending]
+    for i, block in zip(pending, blocks):
+        results[i] = block
+    return results
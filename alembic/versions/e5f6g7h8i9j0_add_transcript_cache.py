@@ -0,0 +1,38 @@
+"""add transcript_cache table
+
+Revision ID: e5f6g7h8i9j0
+Revises: d4e5f6g7h8i9
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6g7h8i9j0'
+down_revision: Union[str, Sequence[str], None] = 'd4e5f6g7h8i9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create transcript_cache table (durable tier of the captions cache)."""
+    op.create_table(
+        'transcript_cache',
+        sa.Column('video_id', sa.String(16), primary_key=True),
+        sa.Column('language', sa.String(35), primary_key=True),
+        sa.Column('segments', JSONB(), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_transcript_cache_created_at', 'transcript_cache', ['created_at'])
+
+
+def downgrade() -> None:
+    """Drop transcript_cache table."""
+    op.drop_index('ix_transcript_cache_created_at', table_name='transcript_cache')
+    op.drop_table('transcript_cache')
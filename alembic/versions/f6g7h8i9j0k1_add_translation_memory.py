@@ -0,0 +1,35 @@
+"""add translation_memory table
+
+Revision ID: f6g7h8i9j0k1
+Revises: e5f6g7h8i9j0
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6g7h8i9j0k1'
+down_revision: Union[str, Sequence[str], None] = 'e5f6g7h8i9j0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create translation_memory table (durable tier of the translation memory)."""
+    op.create_table(
+        'translation_memory',
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('language', sa.String(35), nullable=False),
+        sa.Column('model', sa.String(255), nullable=False),
+        sa.Column('translation', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop translation_memory table."""
+    op.drop_table('translation_memory')
@@ -0,0 +1,47 @@
+"""add stripe_events table and index subscriptions.stripe_subscription_id
+
+Revision ID: g7h8i9j0k1l2
+Revises: f6g7h8i9j0k1
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'g7h8i9j0k1l2'
+down_revision: Union[str, Sequence[str], None] = 'f6g7h8i9j0k1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create stripe_events (webhook inbox) and index subscription lookups."""
+    op.create_table(
+        'stripe_events',
+        sa.Column('id', sa.String(255), primary_key=True),
+        sa.Column('type', sa.String(100), nullable=False),
+        sa.Column('payload', JSONB(), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+    )
+    op.create_index(
+        'ix_stripe_events_pending', 'stripe_events', ['received_at'],
+        postgresql_where=sa.text('processed_at IS NULL'),
+    )
+    op.create_index(
+        'ix_subscriptions_stripe_subscription_id', 'subscriptions', ['stripe_subscription_id']
+    )
+
+
+def downgrade() -> None:
+    """Drop the subscription index and stripe_events table."""
+    op.drop_index('ix_subscriptions_stripe_subscription_id', table_name='subscriptions')
+    op.drop_index('ix_stripe_events_pending', table_name='stripe_events')
+    op.drop_table('stripe_events')
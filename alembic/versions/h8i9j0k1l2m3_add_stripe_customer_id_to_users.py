@@ -0,0 +1,39 @@
+"""add stripe_customer_id to users
+
+Revision ID: h8i9j0k1l2m3
+Revises: g7h8i9j0k1l2
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'h8i9j0k1l2m3'
+down_revision: Union[str, Sequence[str], None] = 'g7h8i9j0k1l2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add users.stripe_customer_id, backfilled from existing subscriptions."""
+    op.add_column('users', sa.Column('stripe_customer_id', sa.String(255), nullable=True, unique=True))
+    op.execute(
+        """
+        UPDATE users SET stripe_customer_id = s.stripe_customer_id
+        FROM (
+            SELECT DISTINCT ON (stripe_customer_id) stripe_customer_id, user_id
+            FROM subscriptions
+            ORDER BY stripe_customer_id, updated_at DESC
+        ) AS s
+        WHERE s.user_id = users.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop users.stripe_customer_id."""
+    op.drop_column('users', 'stripe_customer_id')
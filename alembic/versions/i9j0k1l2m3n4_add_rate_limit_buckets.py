@@ -0,0 +1,41 @@
+"""add rate_limit_buckets table
+
+Revision ID: i9j0k1l2m3n4
+Revises: h8i9j0k1l2m3
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'i9j0k1l2m3n4'
+down_revision: Union[str, Sequence[str], None] = 'h8i9j0k1l2m3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create rate_limit_buckets (shared token buckets for RateLimiter).
+
+    UNLOGGED: losing buckets on a crash only resets limits, and it skips
+    WAL writes on what is a hot, write-per-request table.
+    """
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        prefixes=['UNLOGGED'],
+    )
+    op.create_index('ix_rate_limit_buckets_expires_at', 'rate_limit_buckets', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Drop rate_limit_buckets table."""
+    op.drop_index('ix_rate_limit_buckets_expires_at', table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
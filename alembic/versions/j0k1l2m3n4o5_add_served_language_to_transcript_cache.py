@@ -0,0 +1,29 @@
+"""add served_language to transcript_cache
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'j0k1l2m3n4o5'
+down_revision: Union[str, Sequence[str], None] = 'i9j0k1l2m3n4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add transcript_cache.served_language (set on fallback entries)."""
+    op.add_column('transcript_cache', sa.Column('served_language', sa.String(35), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop fallback entries and transcript_cache.served_language."""
+    op.execute("DELETE FROM transcript_cache WHERE served_language IS NOT NULL")
+    op.drop_column('transcript_cache', 'served_language')
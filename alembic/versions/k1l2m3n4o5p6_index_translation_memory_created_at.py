@@ -0,0 +1,27 @@
+"""index translation_memory.created_at
+
+Revision ID: k1l2m3n4o5p6
+Revises: j0k1l2m3n4o5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'k1l2m3n4o5p6'
+down_revision: Union[str, Sequence[str], None] = 'j0k1l2m3n4o5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index translation_memory.created_at for TTL reads and pruning."""
+    op.create_index('ix_translation_memory_created_at', 'translation_memory', ['created_at'])
+
+
+def downgrade() -> None:
+    """Drop the translation_memory.created_at index."""
+    op.drop_index('ix_translation_memory_created_at', table_name='translation_memory')
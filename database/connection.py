@@ -1,4 +1,8 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import os
 from dotenv import load_dotenv
@@ -8,8 +12,80 @@ database_url = os.getenv("DATABASE_URL")
 if database_url and database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-engine = create_async_engine(database_url)
+# Pool sizing is per uvicorn worker: workers × (size + overflow) must stay
+# under the Postgres connection limit. Pre-ping and recycle drop connections
+# that Railway's proxy silently closed while the app was idle.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Prepared statements cached per connection. Set to 0 behind a
+# transaction-pooling PgBouncer, which can't keep them across transactions.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited.
+
+    The wait covers queueing for a free slot and opening a new connection,
+    i.e. exactly the latency an undersized pool adds to a request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total_s += waited
+            self.wait_max_s = max(self.wait_max_s, waited)
+
+
+engine = create_async_engine(
+    database_url,
+    poolclass=MeteredPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+)
 SessionLocal = async_sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Same pool, but every statement is its own transaction: one round trip,
+# no BEGIN/COMMIT around it. For single-statement writes such as the quota
+# and rate-limit upserts.
+autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+
+def pool_status() -> dict:
+    """Current gauges and cumulative checkout-wait stats for this worker."""
+    pool = engine.sync_engine.pool
+    checkouts = pool.checkouts
+    return {
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": checkouts,
+        "timeouts": pool.timeouts,
+        "wait_ms_avg": round(pool.wait_total_s / checkouts * 1000, 2) if checkouts else None,
+        "wait_ms_max": round(pool.wait_max_s * 1000, 2),
+    }
+
 
 async def get_db():
     async with SessionLocal() as db:
@@ -1,6 +1,6 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint, Integer, Text, Index, Float, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 
@@ -20,6 +20,8 @@ class User(Base):
     usage_count = Column(Integer, default=0, nullable=False)
     usage_reset_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    stripe_customer_id = Column(String(255), nullable=True, unique=True)
+
     oauth_accounts = relationship("OAuthAccount", back_populates="user", cascade="all, delete-orphan")
 
 
@@ -45,10 +47,60 @@ class Subscription(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
     stripe_customer_id = Column(String(255), nullable=False)
-    stripe_subscription_id = Column(String(255), nullable=True)   # null for lifetime
+    stripe_subscription_id = Column(String(255), nullable=True, index=True)   # null for lifetime
     stripe_price_id = Column(String(255), nullable=False)
     status = Column(String(20), nullable=False, default="active")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     user = relationship("User", backref="subscription")
+
+
+class CachedTranscript(Base):
+    __tablename__ = "transcript_cache"
+
+    video_id = Column(String(16), primary_key=True)
+    language = Column(String(35), primary_key=True)
+    # Track actually served when `language` was satisfied by a fallback; null otherwise.
+    served_language = Column(String(35), nullable=True)
+    segments = Column(JSONB, nullable=False)
+    word_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+
+    # sha256 over (model, prompt hash, target language, normalized source text)
+    key = Column(String(64), primary_key=True)
+    language = Column(String(35), nullable=False)
+    model = Column(String(255), nullable=False)
+    translation = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
+class StripeEvent(Base):
+    __tablename__ = "stripe_events"
+
+    # Stripe's event id (evt_...); a redelivered event hits the primary key.
+    id = Column(String(255), primary_key=True)
+    type = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_stripe_events_pending", "received_at", postgresql_where=text("processed_at IS NULL")),
+    )
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # "<limiter>:<client>"; rows past expires_at are full buckets and may go.
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from sqlalchemy import delete, func, literal
+from sqlalchemy.dialects.postgresql import insert
+
+from .connection import autocommit_engine
+from .orm import RateLimitBucket
+
+
+async def take_token(key: str, capacity: float, rate: float, cost: float = 1.0) -> bool:
+    """Take `cost` tokens from the bucket at `key`; False if it holds too few.
+
+    The bucket refills at `rate` tokens/second up to `capacity`. Refill,
+    check and decrement are one upsert, so every worker sharing the
+    database sees the same bucket. A denied request leaves the row as is.
+    """
+    bucket = RateLimitBucket.__table__
+    seconds_to_full = timedelta(seconds=capacity / rate)
+    elapsed = func.extract("epoch", func.now() - bucket.c.updated_at)
+    refilled = func.least(literal(float(capacity)), bucket.c.tokens + elapsed * rate)
+    stmt = insert(bucket).values(
+        key=key,
+        tokens=capacity - cost,
+        updated_at=func.now(),
+        expires_at=func.now() + seconds_to_full,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[bucket.c.key],
+        set_={
+            "tokens": refilled - cost,
+            "updated_at": func.now(),
+            "expires_at": func.now() + seconds_to_full,
+        },
+        where=refilled >= cost,
+    ).returning(bucket.c.key)
+    async with autocommit_engine.connect() as conn:
+        result = await conn.execute(stmt)
+        return result.first() is not None
+
+
+async def prune_buckets() -> int:
+    """Delete buckets that have refilled completely (same as no row at all)."""
+    async with autocommit_engine.connect() as conn:
+        result = await conn.execute(delete(RateLimitBucket).where(RateLimitBucket.expires_at < func.now()))
+        return result.rowcount
@@ -0,0 +1,44 @@
+from sqlalchemy import case, func, update
+
+from .connection import autocommit_engine
+from .orm import User
+
+FREE_MONTHLY_LIMIT = 20
+
+
+def _month(ts):
+    return func.date_trunc("month", func.timezone("UTC", ts))
+
+
+async def consume_free_use(user_id, limit: int = FREE_MONTHLY_LIMIT) -> int | None:
+    """Count one free transcription against `user_id`'s monthly quota.
+
+    Month rollover, limit check and increment happen in one conditional
+    UPDATE, so concurrent requests from the same user can never be admitted
+    past the limit. Returns the new usage count, or None if the user is at
+    the limit (or doesn't exist).
+    """
+    rolled_over = _month(User.usage_reset_at) != _month(func.now())
+    stmt = (
+        update(User)
+        .where(User.id == user_id, rolled_over | (User.usage_count < limit))
+        .values(
+            usage_count=case((rolled_over, 1), else_=User.usage_count + 1),
+            usage_reset_at=case((rolled_over, func.now()), else_=User.usage_reset_at),
+        )
+        .returning(User.usage_count)
+    )
+    async with autocommit_engine.connect() as conn:
+        result = await conn.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+async def refund_free_use(user_id) -> None:
+    """Give back one use taken by consume_free_use (never below zero)."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(usage_count=func.greatest(User.usage_count - 1, 0))
+    )
+    async with autocommit_engine.connect() as conn:
+        await conn.execute(stmt)
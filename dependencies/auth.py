@@ -1,22 +1,71 @@
-from fastapi import Depends, HTTPException, Request                                                                                                                                                                                                                     
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select                                                                                                                                                                                                                            
-from jose import jwt, JWTError  
-from database.connection import get_db
-from database.orm import User
 import os
+import time
+from collections import OrderedDict
+
 from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, Request
+from jose import JWTError, jwt
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import make_transient_to_detached
+
+from database.connection import SessionLocal
+from database.orm import User
 
 load_dotenv()
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = "HS256"
 
+# Per-worker snapshot of recently seen users. Almost every authenticated
+# request only reads the user row (/auth/me, feedback, premium checks);
+# the short TTL bounds how stale a tier can be in another worker, and
+# invalidate_user() drops the entry wherever this worker changes the row.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "4096"))
+
+_user_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+def invalidate_user(user_id) -> None:
+    """Forget the cached row for `user_id`; call after changing the user."""
+    _user_cache.pop(str(user_id), None)
+
 
-async def get_current_user(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-):
+def _remember_user(user: User) -> None:
+    key = str(user.id)
+    _user_cache[key] = (
+        time.monotonic() + USER_CACHE_TTL_SECONDS,
+        {name: getattr(user, name) for name in _USER_COLUMNS},
+    )
+    _user_cache.move_to_end(key)
+    while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+        _user_cache.popitem(last=False)
+
+
+def _cached_user(user_id: str) -> User | None:
+    entry = _user_cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, values = entry
+    if expires_at <= time.monotonic():
+        del _user_cache[user_id]
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+async def get_current_user(request: Request):
+    """The signed-in user as a detached, fully loaded row, or None.
+
+    This deliberately doesn't depend on get_db: a request-scoped session
+    would keep its pool slot until the response finishes, which for the
+    SSE routes is the whole stream. Only a cache miss with a valid token
+    touches the database, through a session closed before returning.
+    Routes that change the user should write through their own session
+    and call invalidate_user().
+    """
     token = request.cookies.get("tubetext_token")
     if not token:
         return None
@@ -30,8 +79,16 @@ async def get_current_user(
     if not user_id:
         return None
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    user = _cached_user(user_id)
+    if user is not None:
+        return user
+
+    async with SessionLocal() as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+    if user is not None:
+        _remember_user(user)
+    return user
 
 
 async def require_premium(user=Depends(get_current_user)):
@@ -0,0 +1,124 @@
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, HTTPException, Request
+
+from database.rate_limit import prune_buckets, take_token
+from dependencies.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+# "memory": per-worker buckets (limits multiply with the worker count).
+# "postgres": one shared bucket per client across all workers.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+RATE_LIMIT_PRUNE_SECONDS = int(os.getenv("RATE_LIMIT_PRUNE_SECONDS", "300"))
+
+
+class MemoryBuckets:
+    """Token buckets for one limiter, kept in this process.
+
+    Each key costs one (tokens, timestamp) pair. Keys are kept in
+    last-use order, so idle keys sit at the front: once a bucket has
+    refilled completely it is indistinguishable from a new one and is
+    dropped, and RATE_LIMIT_MAX_KEYS caps the total either way.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        self._evict_idle(now, capacity / rate)
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+    def _evict_idle(self, now: float, seconds_to_full: float) -> None:
+        while self._buckets:
+            _, updated = next(iter(self._buckets.values()))
+            if now - updated < seconds_to_full:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class PostgresBuckets:
+    """Token buckets shared by every worker through the rate_limit_buckets table."""
+
+    def __init__(self):
+        self._next_prune = 0.0
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self._next_prune = now + RATE_LIMIT_PRUNE_SECONDS
+            try:
+                await prune_buckets()
+            except Exception as e:
+                logger.warning("rate limit prune failed: %s", type(e).__name__)
+        return await take_token(key, capacity, rate, cost)
+
+
+_postgres_buckets: PostgresBuckets | None = None
+
+
+def _default_backend():
+    global _postgres_buckets
+    if RATE_LIMIT_BACKEND == "postgres":
+        if _postgres_buckets is None:
+            _postgres_buckets = PostgresBuckets()
+        return _postgres_buckets
+    return MemoryBuckets()
+
+
+def client_ip(request: Request) -> str:
+    # ProxyHeadersMiddleware has already resolved X-Forwarded-For here.
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """FastAPI dependency allowing `limit` requests per `period` seconds per client.
+
+    A token bucket: bursts up to `limit`, refilling at limit/period per
+    second. Signed-in users are limited per account, everyone else per IP.
+    If the shared backend is unreachable the request is let through rather
+    than failing on a database outage.
+
+        feedback_limit = RateLimiter("feedback", limit=30, period=300)
+
+        @router.post("/video/feedback", dependencies=[Depends(feedback_limit)])
+    """
+
+    def __init__(self, name: str, limit: int, period: float, detail: str = "Too many requests", backend=None):
+        self.name = name
+        self.capacity = float(limit)
+        self.rate = limit / period
+        self.detail = detail
+        self.backend = backend or _default_backend()
+
+    async def __call__(self, request: Request, user=Depends(get_current_user)) -> None:
+        client = f"user:{user.id}" if user else f"ip:{client_ip(request)}"
+        try:
+            allowed = await self.backend.take(f"{self.name}:{client}", self.capacity, self.rate)
+        except Exception as e:
+            logger.warning("rate limit check failed for %s: %s", self.name, type(e).__name__)
+            return
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=self.detail,
+                headers={"Retry-After": str(math.ceil(1 / self.rate))},
+            )
@@ -2,7 +2,7 @@
 
 import { useState, useEffect, useRef } from "react";
 import { TranscriptResult, Mode, ErrorCode, FeedbackName, PremiumStatus } from "@/lib/types";
-import { fetchTranscript, fetchTranscriptPremium, fetchSummary, fetchTranslationStream, downloadPdf, fetchLanguages } from "@/lib/api";
+import { fetchTranscript, fetchTranscriptPremium, fetchSummaryStream, fetchTranslationStream, downloadPdf, fetchLanguages } from "@/lib/api";
 import dynamic from "next/dynamic";
 import Header from "@/components/Header";
 import Hero from "@/components/Hero";
@@ -200,9 +200,12 @@ export default function Home() {
     setShowSignIn(false);
     setFeedbackOpen(null);
     try {
-      const summaryData = await fetchSummary(sourceText, sourceLang, sessionId);
-      setSummary(summaryData.summary);
-      maybeOpenFeedback(summaryData.trace_id, "summary-thumbs", "summary");
+      // Segment boundaries let the backend chunk long transcripts cleanly.
+      const sourceSegments = useTranslationAsSource ? undefined : result.segments.map((s) => s.text);
+      const { trace_id } = await fetchSummaryStream(sourceText, sourceLang, (delta) => {
+        setSummary((prev) => (prev || "") + delta);
+      }, sessionId, sourceSegments);
+      maybeOpenFeedback(trace_id, "summary-thumbs", "summary");
     } catch (err) {
       handleApiError(err);
     } finally {
@@ -219,9 +222,20 @@ export default function Home() {
     setShowSignIn(false);
     setFeedbackOpen(null);
     try {
-      const { trace_id } = await fetchTranslationStream(result.segments, language, (chunk) => {
-        setTranslation((prev) => (prev || "") + chunk + "\n\n");
-      }, sessionId);
+      const captions = result.source === "captions"
+        ? { videoId: result.video_id, language: result.language }
+        : undefined;
+      // Segments stream in parallel: partials append to their own slot and
+      // the final text for a segment replaces them.
+      const parts: string[] = [];
+      const render = () => setTranslation(parts.filter((p) => p).map((p) => p + "\n\n").join(""));
+      const { trace_id } = await fetchTranslationStream(result.segments, language, (chunk, index) => {
+        parts[index ?? parts.length] = chunk;
+        render();
+      }, sessionId, captions, (delta, index, reset) => {
+        parts[index] = (reset ? "" : parts[index] || "") + delta;
+        render();
+      });
       maybeOpenFeedback(trace_id, "translation-thumbs", "translation");
     } catch (err) {
       handleApiError(err);
@@ -5,7 +5,7 @@ import { useVirtualizer } from "@tanstack/react-virtual";
 import ReactMarkdown, { type Components } from "react-markdown";
 import remarkGfm from "remark-gfm";
 import { TranscriptResult, Mode } from "@/lib/types";
-import { downloadPdf } from "@/lib/api";
+import { downloadPdf, downloadExport } from "@/lib/api";
 import { ClipboardIcon, DownloadIcon, CheckIcon } from "./icons";
 
 function useTypewriter(text: string, charsPerFrame = 2): string {
@@ -120,6 +120,10 @@ export default function OutputCard({ result, mode, loading, summary, translation
     await downloadPdf({ kind: "transcript", segments: result.segments, videoId: result.video_id });
   }
 
+  async function handleDownloadSubtitles() {
+    await downloadExport("srt", result.segments, result.video_id);
+  }
+
   return (
     <div className="animate-slide-up w-full max-w-[800px] overflow-hidden rounded-xl border border-border bg-card">
       {/* Loading bar */}
@@ -163,6 +167,15 @@ export default function OutputCard({ result, mode, loading, summary, translation
               <DownloadIcon className="h-4 w-4" />
             </button>
           )}
+          {showPdf && !isLlmMode && (
+            <button
+              onClick={handleDownloadSubtitles}
+              className="flex h-8 items-center justify-center rounded-md px-2 text-sm font-medium transition-colors hover:bg-border/50"
+              aria-label="Download subtitles (SRT)"
+            >
+              SRT
+            </button>
+          )}
         </div>
       </div>
 
@@ -1,4 +1,4 @@
-import { TranscriptResponse, SummaryResponse, Segment, TranslateChunkEvent, PremiumStatus, PremiumStreamEvent, ErrorCode, FeedbackName } from "./types";
+import { TranscriptResponse, SummaryResponse, SummaryChunkEvent, Segment, TranslateChunkEvent, PremiumStatus, PremiumStreamEvent, ErrorCode, FeedbackName } from "./types";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -123,13 +123,14 @@ export async function fetchSummary(
   transcription: string,
   language: string = "en",
   sessionId?: string | null,
+  segments?: string[],
 ): Promise<SummaryResponse> {
   const headers: Record<string, string> = { "Content-Type": "application/json" };
   if (sessionId) headers["X-Session-Id"] = sessionId;
   const res = await fetch(`${API_URL}/video/summary`, {
     method: "POST",
     headers,
-    body: JSON.stringify({ transcription, language }),
+    body: JSON.stringify({ transcription, language, segments }),
     credentials: "include",
   });
   if (!res.ok) {
@@ -141,18 +142,68 @@ export async function fetchSummary(
   return res.json();
 }
 
+export async function fetchSummaryStream(
+  transcription: string,
+  language: string,
+  onDelta: (text: string) => void,
+  sessionId?: string | null,
+  segments?: string[],
+): Promise<{ trace_id?: string }> {
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  if (sessionId) headers["X-Session-Id"] = sessionId;
+  const res = await fetch(`${API_URL}/video/summary/stream`, {
+    method: "POST",
+    headers,
+    body: JSON.stringify({ transcription, language, segments }),
+    credentials: "include",
+  });
+  if (!res.ok) {
+    if (res.status === 401) throw new Error("__AUTH__Sign in required");
+    if (res.status === 403) throw new Error("__PREMIUM__Premium subscription required");
+    throw new Error(`Summary failed: ${res.status}`);
+  }
+
+  const reader = res.body!.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const parts = buffer.split("\n\n");
+    buffer = parts.pop() || "";
+    for (const part of parts) {
+      const line = part.trim();
+      if (!line.startsWith("data: ")) continue;
+      const event: SummaryChunkEvent = JSON.parse(line.slice(6));
+      if (event.error) throw new Error(event.error);
+      if (event.done) return { trace_id: event.trace_id };
+      if (event.delta) onDelta(event.delta);
+    }
+  }
+  throw new Error("Connection interrupted — please try again.");
+}
+
 export async function fetchTranslationStream(
   segments: Segment[],
   language: string,
-  onChunk: (text: string) => void,
+  onChunk: (text: string, index?: number) => void,
   sessionId?: string | null,
+  captions?: { videoId: string; language: string },
+  onPartial?: (delta: string, index: number, reset: boolean) => void,
 ): Promise<{ trace_id?: string }> {
   const headers: Record<string, string> = { "Content-Type": "application/json" };
   if (sessionId) headers["X-Session-Id"] = sessionId;
+  // Caption-sourced transcripts let the backend try YouTube's own caption
+  // translation before falling back to the LLM.
+  const body = captions
+    ? { segments, language, video_id: captions.videoId, source_language: captions.language }
+    : { segments, language };
   const res = await fetch(`${API_URL}/video/translate`, {
     method: "POST",
     headers,
-    body: JSON.stringify({ segments, language }),
+    body: JSON.stringify(body),
     credentials: "include",
   });
   if (!res.ok) {
@@ -177,7 +228,11 @@ export async function fetchTranslationStream(
       const event: TranslateChunkEvent = JSON.parse(line.slice(6));
       if (event.error) throw new Error(event.error);
       if (event.done) return { trace_id: event.trace_id };
-      if (event.translation) onChunk(event.translation);
+      if (event.partial !== undefined && event.index !== undefined) {
+        onPartial?.(event.partial, event.index, event.reset ?? false);
+        continue;
+      }
+      if (event.translation) onChunk(event.translation, event.index);
     }
   }
   return {};
@@ -236,22 +291,64 @@ export async function downloadPdf(payload: PdfPayload): Promise<void> {
         ? { kind: "summary", text: payload.text, video_id: payload.videoId }
         : { kind: "translation", text: payload.text, language: payload.language, video_id: payload.videoId };
 
+  const payloadJson = JSON.stringify(body);
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  // Re-downloading the same document only revalidates; a 304 reuses the blob.
+  if (lastPdf && lastPdf.body === payloadJson) headers["If-None-Match"] = lastPdf.etag;
+
   const res = await fetch(`${API_URL}/video/pdf/`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(body),
+    headers,
+    body: payloadJson,
     credentials: "include",
   });
 
+  if (res.status === 304 && lastPdf) {
+    saveBlob(lastPdf.blob, lastPdf.filename);
+    return;
+  }
   if (!res.ok) {
     throw new Error(`PDF download failed: ${res.status}`);
   }
+  const { blob, filename } = await saveDownload(res, "tubetext.pdf");
+  const etag = res.headers.get("ETag");
+  lastPdf = etag ? { body: payloadJson, etag, blob, filename } : null;
+}
+
+let lastPdf: { body: string; etag: string; blob: Blob; filename: string } | null = null;
+
+export type ExportFormat = "srt" | "vtt" | "txt" | "jsonl";
+
+export async function downloadExport(
+  format: ExportFormat,
+  segments: Segment[],
+  videoId?: string,
+): Promise<void> {
+  const res = await fetch(`${API_URL}/video/export`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ format, segments, video_id: videoId }),
+    credentials: "include",
+  });
+  if (!res.ok) {
+    throw new Error(`Export failed: ${res.status}`);
+  }
+  await saveDownload(res, `tubetext.${format}`);
+}
 
+async function saveDownload(res: Response, fallbackName: string): Promise<{ blob: Blob; filename: string }> {
   const disposition = res.headers.get("Content-Disposition") || "";
-  const match = disposition.match(/filename="?([^"]+)"?/);
-  const filename = match?.[1] || "tubetext.pdf";
+  // Non-ASCII titles arrive RFC 5987-encoded as filename*=utf-8''...
+  const encoded = disposition.match(/filename\*=utf-8''([^;]+)/i);
+  const match = disposition.match(/filename="?([^";]+)"?/);
+  const filename = (encoded && decodeURIComponent(encoded[1])) || match?.[1] || fallbackName;
 
   const blob = await res.blob();
+  saveBlob(blob, filename);
+  return { blob, filename };
+}
+
+function saveBlob(blob: Blob, filename: string): void {
   const url = URL.createObjectURL(blob);
   const a = document.createElement("a");
   a.href = url;
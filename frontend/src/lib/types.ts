@@ -8,6 +8,11 @@ export interface TranscriptResult {
   video_id: string;
   source: "captions" | "audio_transcription";
   language: string;
+  requested_language?: string;
+  fallback_used?: boolean;
+  // Captions responses only; null when the oEmbed lookup failed.
+  title?: string | null;
+  channel?: string | null;
   segments: Segment[];
   word_count: number;
   trace_id?: string;
@@ -28,12 +33,26 @@ export interface SummaryResponse {
   trace_id?: string;
 }
 
+export interface SummaryChunkEvent {
+  delta?: string;
+  done?: boolean;
+  error?: string;
+  trace_id?: string;
+}
+
 export interface TranslateResponse {
   translation: string;
 }
 
 export interface TranslateChunkEvent {
   translation?: string;
+  // In-progress text for segment `index`; the final `translation` event for
+  // that index replaces whatever partials were shown.
+  partial?: string;
+  // Set when the segment is being re-translated: clear its partial text
+  // before applying `partial`.
+  reset?: boolean;
+  index?: number;
   done?: boolean;
   error?: string;
   trace_id?: string;
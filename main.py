@@ -1,6 +1,9 @@
 #  uvicorn main:app --reload
 # cd frontend 
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -22,8 +25,24 @@ if sentry_dsn:
     )
 
 from routes import all_routes
+from database.connection import pool_status
+from routes.pdf_request import start_pdf_pool, stop_pdf_pool
+from routes.stripe_events import run_event_sweeper
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Retries Stripe webhook events whose post-response apply didn't finish.
+    sweeper = asyncio.create_task(run_event_sweeper())
+    start_pdf_pool()
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        stop_pdf_pool()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=["*"])
 app.add_middleware(SessionMiddleware, secret_key=os.getenv("JWT_SECRET"))
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -33,7 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "ETag"],
 )
 for route in all_routes:
     app.include_router(route)
@@ -42,3 +61,8 @@ for route in all_routes:
 def check_health():
     return {"status" : "ok"}
 
+@app.get("/health/db")
+def check_db_pool():
+    # Per-worker pool gauges; no query is made, so this never takes a slot.
+    return pool_status()
+
@@ -0,0 +1,170 @@
+"""PDF layout for the export routes, run inside the PDF process pool.
+
+Imports nothing but fpdf2/fontTools: pool workers are spawned, and each
+one imports this module fresh, so pulling in the app (LLM clients, DB
+engines, yt-dlp) here would cost seconds and memory per worker.
+"""
+import copy
+import io
+import os
+import tempfile
+import time
+
+from fontTools import ttLib
+from fpdf import FPDF
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+_LOGO_PATH = os.path.join(_DATA_DIR, "tubetext_logo.png")
+_FONT_REGULAR = os.path.join(_DATA_DIR, "fonts", "DejaVuSans.ttf")
+_FONT_BOLD = os.path.join(_DATA_DIR, "fonts", "DejaVuSans-Bold.ttf")
+
+
+_VARIANT_HEADING = {
+    "transcript": "Transcript",
+    "summary": "Summary",
+    "translation": "Translation",
+}
+
+
+def _strip_markdown(s: str) -> str:
+    out_lines = []
+    for line in s.splitlines():
+        stripped = line.lstrip()
+        if stripped.startswith("#"):
+            stripped = stripped.lstrip("#").lstrip()
+        if stripped.startswith("- "):
+            stripped = "• " + stripped[2:]
+        stripped = stripped.replace("**", "").replace("__", "")
+        out_lines.append(stripped)
+    return "\n".join(out_lines)
+
+
+_template: FPDF | None = None
+_font_bytes: dict[str, bytes] = {}
+
+
+def _draw_header(pdf: FPDF) -> None:
+    pdf.image(_LOGO_PATH, x=10, y=10, w=18)
+    pdf.set_xy(30, 14)
+    pdf.set_font("DejaVu", "B", 16)
+    pdf.cell(0, 9, "TubeText", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("DejaVu", "", 9)
+    pdf.set_text_color(140, 140, 140)
+    pdf.set_xy(10, 14)
+    pdf.cell(0, 9, "tubetext.app", align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(4)
+
+
+def warm_template() -> None:
+    """Build (once per process) a first page with fonts, logo and header done.
+
+    Parsing both DejaVu fonts and the logo used to happen on every request.
+    Also used as the PDF pool's initializer so workers pay this at startup.
+    """
+    global _template
+    if _template is None:
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=20)
+        pdf.add_font("DejaVu", "", _FONT_REGULAR, uni=True)
+        pdf.add_font("DejaVu", "B", _FONT_BOLD, uni=True)
+        for key, font in pdf.fonts.items():
+            with open(font.ttffile, "rb") as f:
+                _font_bytes[key] = f.read()
+        pdf.add_page()
+        _draw_header(pdf)
+        _template = pdf
+
+
+def _new_pdf() -> FPDF:
+    """A fresh document positioned just below the branded header."""
+    warm_template()
+    pdf = copy.deepcopy(_template)
+    # fpdf2 shares each font's fontTools object between copies, and output()
+    # subsets it in place — give every document its own, parsed lazily from
+    # the cached font bytes.
+    for key, font in pdf.fonts.items():
+        font.ttfont = ttLib.TTFont(io.BytesIO(_font_bytes[key]), recalcTimestamp=False, lazy=True)
+    return pdf
+
+
+def _build_pdf(segments: list[dict], title: str) -> FPDF:
+    """Lay out a branded PDF with timestamped transcript segments."""
+    pdf = _new_pdf()
+
+    # --- Video title (centered) ---
+    pdf.set_font("DejaVu", "B", 13)
+    pdf.multi_cell(0, 7, title, align="C")
+    pdf.ln(2)
+
+    # --- Divider (below title) ---
+    y = pdf.get_y()
+    pdf.set_draw_color(210, 210, 210)
+    pdf.line(10, y, 200, y)
+    pdf.ln(6)
+
+    # --- Segments ---
+    for seg in segments:
+        # Timestamp — bold black, on its own line
+        pdf.set_font("DejaVu", "B", 10)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(0, 5, seg.get("timestamp", ""), new_x="LMARGIN", new_y="NEXT")
+
+        # Text — regular black, below timestamp
+        pdf.set_font("DejaVu", "", 10)
+        pdf.multi_cell(0, 5, seg.get("text", ""))
+        pdf.ln(3)
+
+    return pdf
+
+
+def _build_text_pdf(text: str, title: str, heading: str) -> FPDF:
+    pdf = _new_pdf()
+
+    pdf.set_font("DejaVu", "B", 13)
+    pdf.multi_cell(0, 7, title, align="C")
+    pdf.ln(1)
+
+    pdf.set_font("DejaVu", "B", 11)
+    pdf.set_text_color(140, 140, 140)
+    pdf.multi_cell(0, 6, heading, align="C")
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(2)
+
+    y = pdf.get_y()
+    pdf.set_draw_color(210, 210, 210)
+    pdf.line(10, y, 200, y)
+    pdf.ln(6)
+
+    pdf.set_font("DejaVu", "", 11)
+    pdf.multi_cell(0, 6, text)
+
+    return pdf
+
+
+def render_pdf(kind: str, segments: list[dict] | None, text: str | None, title: str) -> tuple[str, int, float]:
+    """Pool entry point: write the PDF to a new temp file.
+
+    Returns (path, size, layout seconds); the caller owns the file from
+    then on. On failure the worker removes it itself, so a crashed or
+    abandoned render never leaves a file behind.
+
+    Writing to disk keeps the document out of the API process entirely —
+    returning bytes meant pickling it across the pool and holding it in the
+    parent until the response was sent. The worker still builds it in memory
+    (fpdf2 has no incremental writer), but that is bounded by PDF_WORKERS.
+    """
+    started = time.perf_counter()
+    fd, path = tempfile.mkstemp(prefix="tubetext-", suffix=".pdf")
+    os.close(fd)
+    try:
+        if kind == "transcript":
+            pdf = _build_pdf(segments, title)
+        else:
+            body = _strip_markdown(text) if kind == "summary" else text
+            pdf = _build_text_pdf(body, title, _VARIANT_HEADING[kind])
+        pdf.output(path)
+        return path, os.path.getsize(path), time.perf_counter() - started
+    except BaseException:
+        os.unlink(path)
+        raise
@@ -1,6 +1,7 @@
 from .video_transcript import router as video_router
 from .video_transcript_premium import router as premium_router
 from .pdf_request import router as pdf_router
+from .export_router import router as export_router
 from .summary_router import router as summary_router
 from .translate_router import router as translate_router
 from .feedback_router import router as feedback_router
@@ -9,4 +10,4 @@ from .language_detect import router as language_router
 from .payments import router as payments_router
 
 
-all_routes = [video_router, premium_router, pdf_router, summary_router, translate_router, feedback_router, auth_router, language_router, payments_router]
+all_routes = [video_router, premium_router, pdf_router, export_router, summary_router, translate_router, feedback_router, auth_router, language_router, payments_router]
@@ -114,7 +114,7 @@ async def auth_callback(request: Request, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/me")
-async def get_me(user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def get_me(user=Depends(get_current_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     return {
@@ -0,0 +1,141 @@
+import json
+import re
+from typing import Callable, Iterable, Iterator, Literal
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from .pdf_request import _content_disposition, _safe_filename
+from .video_metadata import get_video_title
+
+router = APIRouter()
+
+# Segments only carry a start time; each cue ends where the next one starts.
+# The last cue gets merge_segments' ~30 s target length.
+LAST_CUE_SECONDS = 30.0
+# Small writes are joined into chunks of about this size before being sent.
+EXPORT_CHUNK_BYTES = 16 * 1024
+
+_MEDIA_TYPES = {
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def _parse_timestamp(timestamp: str) -> float | None:
+    """'(MM:SS)' / '(H:MM:SS)' as produced by format_timestamp → seconds."""
+    parts = timestamp.strip().strip("()").split(":")
+    try:
+        values = [int(p) for p in parts]
+    except ValueError:
+        return None
+    if not 2 <= len(values) <= 3:
+        return None
+    seconds = 0
+    for value in values:
+        seconds = seconds * 60 + value
+    return float(seconds)
+
+
+def _cues(segments: list[dict]) -> Iterator[tuple[float, float, dict]]:
+    """Yield (start, end, segment); unparseable timestamps reuse the previous start."""
+    starts: list[float] = []
+    previous = 0.0
+    for seg in segments:
+        start = _parse_timestamp(seg.get("timestamp", ""))
+        previous = start if start is not None else previous
+        starts.append(previous)
+    for i, seg in enumerate(segments):
+        start = starts[i]
+        following = starts[i + 1] if i + 1 < len(starts) else None
+        end = following if following is not None and following > start else start + LAST_CUE_SECONDS
+        yield start, end, seg
+
+
+def _clock(seconds: float, separator: str) -> str:
+    millis = round(seconds * 1000)
+    hrs, millis = divmod(millis, 3_600_000)
+    mins, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hrs:02d}:{mins:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _cue_text(text: str) -> str:
+    # A blank line ends a cue in both formats, and VTT forbids "-->" in text.
+    return re.sub(r"\n\s*\n", "\n", text.strip()).replace("-->", "->")
+
+
+def export_srt(segments: list[dict]) -> Iterator[str]:
+    for n, (start, end, seg) in enumerate(_cues(segments), 1):
+        yield f"{n}\n{_clock(start, ',')} --> {_clock(end, ',')}\n{_cue_text(seg.get('text', ''))}\n\n"
+
+
+def export_vtt(segments: list[dict]) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for start, end, seg in _cues(segments):
+        yield f"{_clock(start, '.')} --> {_clock(end, '.')}\n{_cue_text(seg.get('text', ''))}\n\n"
+
+
+def export_txt(segments: list[dict]) -> Iterator[str]:
+    for seg in segments:
+        timestamp = seg.get("timestamp", "")
+        yield f"{timestamp}\n{seg.get('text', '')}\n\n" if timestamp else f"{seg.get('text', '')}\n\n"
+
+
+def export_jsonl(segments: list[dict]) -> Iterator[str]:
+    for start, end, seg in _cues(segments):
+        record = {"start": start, "end": end, "timestamp": seg.get("timestamp", ""), "text": seg.get("text", "")}
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+_EXPORTERS: dict[str, Callable[[list[dict]], Iterator[str]]] = {
+    "srt": export_srt,
+    "vtt": export_vtt,
+    "txt": export_txt,
+    "jsonl": export_jsonl,
+}
+
+
+async def _chunked(parts: Iterable[str]):
+    # Exporters are trivial string formatting, so iterate them right on the
+    # event loop (no threadpool hop per cue) and send sizeable chunks.
+    buffer: list[bytes] = []
+    size = 0
+    for part in parts:
+        data = part.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+class ExportRequest(BaseModel):
+    format: Literal["srt", "vtt", "txt", "jsonl"] = "srt"
+    segments: list[dict]
+    language: str | None = None
+    video_id: str | None = None
+
+
+@router.post("/video/export")
+async def export_video(request: ExportRequest):
+    """Download transcript segments as SRT, WebVTT, plain text or JSON lines.
+
+    A cheap alternative to /video/pdf/: no layout engine, no process pool,
+    just streamed string formatting.
+    """
+    if not request.segments:
+        raise HTTPException(400, "segments required for export")
+
+    title = await get_video_title(request.video_id)
+    filename = _safe_filename(title, "transcript", request.language, ext=request.format)
+    return StreamingResponse(
+        _chunked(_EXPORTERS[request.format](request.segments)),
+        media_type=_MEDIA_TYPES[request.format],
+        headers={"Content-Disposition": _content_disposition(filename)},
+    )
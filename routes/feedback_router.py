@@ -1,13 +1,12 @@
 import logging
-import time
-from collections import defaultdict, deque
+import os
 from typing import Literal
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends
 from langfuse import get_client
 from pydantic import BaseModel, Field
 
-from dependencies.auth import get_current_user
+from dependencies.rate_limit import RateLimiter
 
 logger = logging.getLogger(__name__)
 langfuse = get_client()
@@ -23,20 +22,12 @@ class FeedbackRequest(BaseModel):
     comment: str | None = Field(None, max_length=500)
 
 
-_RATE_WINDOW_SEC = 300
-_RATE_MAX = 30
-_ip_hits: dict[str, deque[float]] = defaultdict(deque)
-
-
-def _check_rate(ip: str) -> bool:
-    now = time.monotonic()
-    hits = _ip_hits[ip]
-    while hits and hits[0] < now - _RATE_WINDOW_SEC:
-        hits.popleft()
-    if len(hits) >= _RATE_MAX:
-        return False
-    hits.append(now)
-    return True
+feedback_limit = RateLimiter(
+    "feedback",
+    limit=int(os.getenv("FEEDBACK_RATE_LIMIT", "30")),
+    period=int(os.getenv("FEEDBACK_RATE_PERIOD_SECONDS", "300")),
+    detail="Too many feedback submissions",
+)
 
 
 def _write_score(req: FeedbackRequest) -> None:
@@ -53,15 +44,10 @@ def _write_score(req: FeedbackRequest) -> None:
         logger.exception("feedback score write failed")
 
 
-@router.post("/video/feedback")
+@router.post("/video/feedback", dependencies=[Depends(feedback_limit)])
 async def submit_feedback(
     payload: FeedbackRequest,
     background_tasks: BackgroundTasks,
-    request: Request,
-    user=Depends(get_current_user),
 ):
-    ip = request.client.host if request.client else "unknown"
-    if not _check_rate(ip):
-        raise HTTPException(status_code=429, detail="Too many feedback submissions")
     background_tasks.add_task(_write_score, payload)
     return {"ok": True}
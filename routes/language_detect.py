@@ -1,14 +1,12 @@
 import logging
-import os
 
 import sentry_sdk
 from dotenv import load_dotenv
 from fastapi import APIRouter
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.proxies import WebshareProxyConfig
 
+from .transcript_cache import load_transcript_list
 from .utils import extract_video_id
-from .youtube_proxy import error_response, with_retries
+from .youtube_proxy import error_response
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -16,6 +14,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def describe_languages(transcript_list) -> list[dict]:
+    return [{"code": t.language_code, "name": t.language} for t in transcript_list]
+
+
 @router.get("/video/languages")
 async def get_video_languages(video_url: str):
     try:
@@ -23,23 +25,14 @@ async def get_video_languages(video_url: str):
     except ValueError as e:
         return error_response(e, languages=[], default=None)
 
-    def _list():
-        ytt_api = YouTubeTranscriptApi(
-            proxy_config=WebshareProxyConfig(
-                proxy_username=os.getenv("WEBSHARE_PROXY_USERNAME"),
-                proxy_password=os.getenv("WEBSHARE_PROXY_PASSWORD"),
-            )
-        )
-        return ytt_api.list(video_id)
-
     try:
-        transcript_list = await with_retries(_list)
+        transcript_list = await load_transcript_list(video_id)
     except Exception as e:
         sentry_sdk.capture_exception(e)
         logger.warning("language_detect failed for %s: %s", video_url, type(e).__name__)
         return error_response(e, languages=[], default=None)
 
-    languages = [{"code": t.language_code, "name": t.language} for t in transcript_list]
+    languages = describe_languages(transcript_list)
     return {
         "success": True,
         "languages": languages,
@@ -1,16 +1,18 @@
 import os
+import json
 import asyncio
 import logging
 
 import stripe
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
-from database.connection import get_db
-from database.orm import User, Subscription
-from dependencies.auth import get_current_user
+from database.connection import SessionLocal
+from database.orm import Subscription, User
+from dependencies.auth import get_current_user, invalidate_user
+
+from .stripe_events import apply_event, record_event
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,66 @@ STRIPE_LIFETIME_PRICE = os.getenv("STRIPE_LIFETIME_PRICE_ID")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
 
+async def _concurrently_created_customer(user) -> str:
+    """Wait for a concurrent request's Customer.create to land, then use it."""
+    for delay in (0.5, 1.0, 2.0):
+        await asyncio.sleep(delay)
+        async with SessionLocal() as db:
+            stored = await db.execute(select(User.stripe_customer_id).where(User.id == user.id))
+            customer_id = stored.scalar_one_or_none()
+        if customer_id:
+            return customer_id
+        customers = await asyncio.to_thread(stripe.Customer.list, email=user.email, limit=1)
+        if customers.data:
+            return customers.data[0].id
+    raise HTTPException(status_code=503, detail="Checkout is busy, please try again")
+
+
+async def _stripe_customer_id(user) -> str:
+    """The user's Stripe customer id, resolving and storing it on first use.
+
+    Customer.create carries a per-user idempotency key, so a retried or
+    repeated create returns the same customer. Two creates *in flight* at
+    once are a different matter: Stripe rejects the second with an
+    IdempotencyError, and that request then picks up the customer the
+    first one is creating. The id is only written where none is stored yet.
+    """
+    if user.stripe_customer_id:
+        return user.stripe_customer_id
+
+    # Customers created before ids were stored locally are found by email.
+    customers = await asyncio.to_thread(stripe.Customer.list, email=user.email, limit=1)
+    if customers.data:
+        customer_id = customers.data[0].id
+    else:
+        try:
+            customer = await asyncio.to_thread(
+                stripe.Customer.create,
+                email=user.email,
+                name=user.name,
+                metadata={"user_id": str(user.id)},
+                idempotency_key=f"customer-create-{user.id}",
+            )
+            customer_id = customer.id
+        except stripe.IdempotencyError:
+            customer_id = await _concurrently_created_customer(user)
+
+    async with SessionLocal() as db:
+        stored = await db.execute(
+            update(User)
+            .where(User.id == user.id, User.stripe_customer_id.is_(None))
+            .values(stripe_customer_id=customer_id)
+            .returning(User.stripe_customer_id)
+        )
+        if stored.scalar_one_or_none() is None:
+            # Another request stored one first; keep using theirs.
+            existing = await db.execute(select(User.stripe_customer_id).where(User.id == user.id))
+            customer_id = existing.scalar_one()
+        await db.commit()
+    invalidate_user(user.id)
+    return customer_id
+
+
 # ── Endpoints ────────────────────────────────────────────────────────
 
 
@@ -35,7 +97,6 @@ class CheckoutRequest(BaseModel):
 async def create_checkout(
     body: CheckoutRequest,
     user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
 ):
     if not user:
         raise HTTPException(status_code=401, detail="Sign in required")
@@ -51,17 +112,12 @@ async def create_checkout(
 
     mode = "payment" if body.plan == "lifetime" else "subscription"
 
-    # Find or create Stripe customer by email
-    customers = await asyncio.to_thread(stripe.Customer.list, email=user.email, limit=1)
-    if customers.data:
-        customer = customers.data[0]
-    else:
-        customer = await asyncio.to_thread(stripe.Customer.create, email=user.email, name=user.name)
+    customer_id = await _stripe_customer_id(user)
 
     session = await asyncio.to_thread(
         stripe.checkout.Session.create,
         mode=mode,
-        customer=customer.id,
+        customer=customer_id,
         line_items=[{"price": price_id, "quantity": 1}],
         metadata={"user_id": str(user.id)},
         success_url=FRONTEND_URL,
@@ -72,139 +128,46 @@ async def create_checkout(
 
 
 @router.post("/webhook")
-async def handle_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+async def handle_webhook(request: Request, background_tasks: BackgroundTasks):
     raw_body = await request.body()
     sig_header = request.headers.get("Stripe-Signature", "")
 
     try:
-        event = stripe.Webhook.construct_event(raw_body, sig_header, STRIPE_WEBHOOK_SECRET)
+        stripe.Webhook.construct_event(raw_body, sig_header, STRIPE_WEBHOOK_SECRET)
     except stripe.SignatureVerificationError:
         raise HTTPException(status_code=400, detail="Invalid signature")
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid payload")
 
-    event_type = event["type"]
-    data_object = event["data"]["object"]
-
-    # ── checkout.session.completed ──────────────────────────────────
-    if event_type == "checkout.session.completed":
-        metadata = data_object["metadata"] if "metadata" in data_object else {}
-        user_id = metadata["user_id"] if "user_id" in metadata else None
-        if not user_id:
-            logger.warning("Checkout session missing user_id in metadata")
-            return {"ok": True}
-
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if not user:
-            logger.warning(f"Webhook: user {user_id} not found")
-            return {"ok": True}
-
-        stripe_customer_id = data_object["customer"]
-        stripe_subscription_id = data_object["subscription"] if "subscription" in data_object else None
-        # Retrieve the price ID from line items
-        line_items = await asyncio.to_thread(
-            stripe.checkout.Session.list_line_items, data_object["id"], limit=1
-        )
-        stripe_price_id = line_items.data[0].price.id if line_items.data else ""
-
-        sub_result = await db.execute(select(Subscription).where(Subscription.user_id == user.id))
-        subscription = sub_result.scalar_one_or_none()
-
-        user.tier = "premium"
-        if subscription:
-            subscription.stripe_customer_id = stripe_customer_id
-            subscription.stripe_subscription_id = stripe_subscription_id
-            subscription.stripe_price_id = stripe_price_id
-            subscription.status = "active"
-        else:
-            subscription = Subscription(
-                user_id=user.id,
-                stripe_customer_id=stripe_customer_id,
-                stripe_subscription_id=stripe_subscription_id,
-                stripe_price_id=stripe_price_id,
-                status="active",
-            )
-            db.add(subscription)
-
-        db.add(user)
-        await db.commit()
-        logger.info(f"checkout.session.completed → user {user_id} upgraded to premium")
-
-    # ── customer.subscription.updated ──────────────────────────────
-    elif event_type == "customer.subscription.updated":
-        stripe_sub_id = data_object["id"]
-        status = data_object["status"]
-
-        sub_result = await db.execute(
-            select(Subscription).where(Subscription.stripe_subscription_id == stripe_sub_id)
-        )
-        subscription = sub_result.scalar_one_or_none()
-        if not subscription:
-            logger.warning(f"subscription.updated: no row for {stripe_sub_id}")
-            return {"ok": True}
-
-        result = await db.execute(select(User).where(User.id == subscription.user_id))
-        user = result.scalar_one_or_none()
-
-        if status == "active":
-            subscription.status = "active"
-            if user:
-                user.tier = "premium"
-        elif status in ("canceled", "past_due", "unpaid"):
-            subscription.status = status
-            if user:
-                user.tier = "free"
-
-        if user:
-            db.add(user)
-        db.add(subscription)
-        await db.commit()
-        logger.info(f"subscription.updated → {stripe_sub_id} status={status}")
-
-    # ── customer.subscription.deleted ──────────────────────────────
-    elif event_type == "customer.subscription.deleted":
-        stripe_sub_id = data_object["id"]
-
-        sub_result = await db.execute(
-            select(Subscription).where(Subscription.stripe_subscription_id == stripe_sub_id)
-        )
-        subscription = sub_result.scalar_one_or_none()
-        if not subscription:
-            logger.warning(f"subscription.deleted: no row for {stripe_sub_id}")
-            return {"ok": True}
-
-        result = await db.execute(select(User).where(User.id == subscription.user_id))
-        user = result.scalar_one_or_none()
-
-        subscription.status = "cancelled"
-        if user:
-            user.tier = "free"
-            db.add(user)
-        db.add(subscription)
-        await db.commit()
-        logger.info(f"subscription.deleted → {stripe_sub_id} cancelled")
-
+    # Acknowledge as soon as the event is stored: Stripe retries slow
+    # responses, and a retried delivery now just hits the primary key.
+    # If the insert fails we return 500 and Stripe redelivers later.
+    payload = json.loads(raw_body)
+    if await record_event(payload):
+        background_tasks.add_task(apply_event, payload["id"])
+    else:
+        logger.info(f"webhook: duplicate delivery of {payload['id']}")
     return {"ok": True}
 
 
 @router.get("/portal")
-async def get_customer_portal(
-    user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-):
+async def get_customer_portal(user=Depends(get_current_user)):
     if not user:
         raise HTTPException(status_code=401, detail="Sign in required")
 
-    result = await db.execute(select(Subscription).where(Subscription.user_id == user.id))
-    subscription = result.scalar_one_or_none()
-
-    if not subscription:
+    # Starting a checkout already stores a customer id, so only an actual
+    # Subscription row means there is something to manage.
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(Subscription.stripe_customer_id).where(Subscription.user_id == user.id)
+        )
+        subscription_customer_id = result.scalar_one_or_none()
+    if subscription_customer_id is None:
         raise HTTPException(status_code=404, detail="No subscription found")
 
     session = await asyncio.to_thread(
         stripe.billing_portal.Session.create,
-        customer=subscription.stripe_customer_id,
+        customer=user.stripe_customer_id or subscription_customer_id,
         return_url=FRONTEND_URL,
     )
     return {"url": session.url}
@@ -1,152 +1,183 @@
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
 import os
 import re
-import json
-import urllib.request
-import urllib.error
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date
 from typing import Literal
+from urllib.parse import quote
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from fpdf import FPDF
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
-router = APIRouter()
+from rendering.pdf import render_pdf, warm_template
 
-_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-_LOGO_PATH = os.path.join(_DATA_DIR, "tubetext_logo.png")
-_FONT_REGULAR = os.path.join(_DATA_DIR, "fonts", "DejaVuSans.ttf")
-_FONT_BOLD = os.path.join(_DATA_DIR, "fonts", "DejaVuSans-Bold.ttf")
+from .cache import TTLCache
+from .video_metadata import get_video_title
 
+logger = logging.getLogger(__name__)
 
-def _fetch_video_title(video_id: str | None) -> str:
-    """Fetch title via YouTube oEmbed (no API key needed). Falls back to 'Transcript'."""
-    if not video_id:
-        return "Transcript"
-    try:
-        url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-        req = urllib.request.Request(url, headers={"User-Agent": "TubeText/1.0"})
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            data = json.loads(resp.read().decode())
-            return data.get("title", "Transcript")
-    except Exception:
-        return "Transcript"
-
-
-_VARIANT_HEADING = {
-    "transcript": "Transcript",
-    "summary": "Summary",
-    "translation": "Translation",
-}
-
-
-def _strip_markdown(s: str) -> str:
-    out_lines = []
-    for line in s.splitlines():
-        stripped = line.lstrip()
-        if stripped.startswith("#"):
-            stripped = stripped.lstrip("#").lstrip()
-        if stripped.startswith("- "):
-            stripped = "• " + stripped[2:]
-        stripped = stripped.replace("**", "").replace("__", "")
-        out_lines.append(stripped)
-    return "\n".join(out_lines)
-
-
-def _safe_filename(title: str, kind: str, language: str | None) -> str:
+router = APIRouter()
+
+# fpdf2 layout is pure-Python CPU work (seconds for a multi-hour transcript);
+# run inline it froze the worker's event loop, SSE streams included. Renders
+# go to a small process pool instead, and once PDF_MAX_PENDING renders are
+# queued or running we answer 503 rather than letting the backlog grow.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_PENDING = int(os.getenv("PDF_MAX_PENDING", "8"))
+
+# Identical exports (a user re-clicking, or everyone on a trending video)
+# are served from memory. Only documents up to PDF_CACHE_MAX_BYTES are kept,
+# so the cache never holds more than entries × that size.
+PDF_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", "64"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024)))
+PDF_CACHE_TTL_SECONDS = int(os.getenv("PDF_CACHE_TTL_SECONDS", str(60 * 60)))
+# Part of every ETag: bump whenever the rendered layout changes so clients
+# and the render cache stop matching old documents.
+TEMPLATE_VERSION = 1
+
+_rendered = TTLCache(maxsize=PDF_CACHE_MAX_ENTRIES, ttl=PDF_CACHE_TTL_SECONDS)
+
+def _safe_filename(title: str, kind: str, language: str | None, ext: str = "pdf") -> str:
     name = re.sub(r"[^\w\s-]", "", title)
     name = re.sub(r"\s+", "_", name.strip())[:80] or "video"
     today = date.today().isoformat()
     if kind == "translation" and language:
-        return f"{name}_translation_{language}_{today}.pdf"
+        return f"{name}_translation_{language}_{today}.{ext}"
     if kind == "transcript":
-        return f"{name}_transcription_{today}.pdf"
-    return f"{name}_{kind}_{today}.pdf"
-
-
-def _build_pdf(segments: list[dict], title: str) -> bytes:
-    """Build a branded PDF with timestamped transcript segments."""
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=20)
-    pdf.add_font("DejaVu", "", _FONT_REGULAR, uni=True)
-    pdf.add_font("DejaVu", "B", _FONT_BOLD, uni=True)
-    pdf.add_page()
-
-    # --- Branded header ---
-    pdf.image(_LOGO_PATH, x=10, y=10, w=18)
-    pdf.set_xy(30, 14)
-    pdf.set_font("DejaVu", "B", 16)
-    pdf.cell(0, 9, "TubeText", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("DejaVu", "", 9)
-    pdf.set_text_color(140, 140, 140)
-    pdf.set_xy(10, 14)
-    pdf.cell(0, 9, "tubetext.app", align="R", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)
-    pdf.ln(4)
-
-    # --- Video title (centered) ---
-    pdf.set_font("DejaVu", "B", 13)
-    pdf.multi_cell(0, 7, title, align="C")
-    pdf.ln(2)
-
-    # --- Divider (below title) ---
-    y = pdf.get_y()
-    pdf.set_draw_color(210, 210, 210)
-    pdf.line(10, y, 200, y)
-    pdf.ln(6)
-
-    # --- Segments ---
-    for seg in segments:
-        # Timestamp — bold black, on its own line
-        pdf.set_font("DejaVu", "B", 10)
-        pdf.set_text_color(0, 0, 0)
-        pdf.cell(0, 5, seg.get("timestamp", ""), new_x="LMARGIN", new_y="NEXT")
-
-        # Text — regular black, below timestamp
-        pdf.set_font("DejaVu", "", 10)
-        pdf.multi_cell(0, 5, seg.get("text", ""))
-        pdf.ln(3)
-
-    return bytes(pdf.output())
-
-
-def _build_text_pdf(text: str, title: str, heading: str) -> bytes:
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=20)
-    pdf.add_font("DejaVu", "", _FONT_REGULAR, uni=True)
-    pdf.add_font("DejaVu", "B", _FONT_BOLD, uni=True)
-    pdf.add_page()
-
-    pdf.image(_LOGO_PATH, x=10, y=10, w=18)
-    pdf.set_xy(30, 14)
-    pdf.set_font("DejaVu", "B", 16)
-    pdf.cell(0, 9, "TubeText", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("DejaVu", "", 9)
-    pdf.set_text_color(140, 140, 140)
-    pdf.set_xy(10, 14)
-    pdf.cell(0, 9, "tubetext.app", align="R", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)
-    pdf.ln(4)
-
-    pdf.set_font("DejaVu", "B", 13)
-    pdf.multi_cell(0, 7, title, align="C")
-    pdf.ln(1)
-
-    pdf.set_font("DejaVu", "B", 11)
-    pdf.set_text_color(140, 140, 140)
-    pdf.multi_cell(0, 6, heading, align="C")
-    pdf.set_text_color(0, 0, 0)
-    pdf.ln(2)
-
-    y = pdf.get_y()
-    pdf.set_draw_color(210, 210, 210)
-    pdf.line(10, y, 200, y)
-    pdf.ln(6)
-
-    pdf.set_font("DejaVu", "", 11)
-    pdf.multi_cell(0, 6, text)
-
-    return bytes(pdf.output())
+        return f"{name}_transcription_{today}.{ext}"
+    return f"{name}_{kind}_{today}.{ext}"
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+_executor: ProcessPoolExecutor | None = None
+_pending = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the parent has Sentry/Langfuse threads and an
+        # event loop that a forked child must not inherit mid-flight. The
+        # workers only import rendering.pdf, not the app.
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_template,
+        )
+    return _executor
+
+
+def start_pdf_pool() -> None:
+    """Spawn and warm the PDF workers now rather than on the first export."""
+    executor = _get_executor()
+    for _ in range(PDF_WORKERS):
+        executor.submit(warm_template)
+
+
+def stop_pdf_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _discard_render(future: Future) -> None:
+    # Done callback for a render nobody is waiting for any more.
+    if not future.cancelled() and future.exception() is None:
+        os.unlink(future.result()[0])
+
+
+async def _render_in_pool(kind: str, segments: list[dict] | None, text: str | None, title: str) -> tuple[str, int, dict]:
+    """Render off the event loop into a temp file.
+
+    Returns (path, size, timings in ms); the caller owns and must delete the
+    file.
+    """
+    global _executor, _pending
+    if _pending >= PDF_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="PDF export is busy, please try again in a moment",
+            headers={"Retry-After": "5"},
+        )
+    _pending += 1
+    started = time.perf_counter()
+    future = None
+    executor = _get_executor()
+    try:
+        future = executor.submit(render_pdf, kind, segments, text, title)
+        path, size, render_s = await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        # A worker died (OOM on a huge document, most likely). The pool is
+        # unusable from here on; shut it down and drop it so the next request
+        # starts a new one — unless a concurrent request already did.
+        logger.exception("PDF worker pool broke; recreating")
+        if _executor is executor:
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(status_code=503, detail="PDF export failed, please try again")
+    except asyncio.CancelledError:
+        # The worker keeps rendering after we stop waiting; whoever finishes
+        # last cleans up the file it produced.
+        if future is not None:
+            future.add_done_callback(_discard_render)
+        raise
+    finally:
+        _pending -= 1
+    total_s = time.perf_counter() - started
+    timings = {
+        "render": round(render_s * 1000, 1),
+        "queue": round(max(total_s - render_s, 0) * 1000, 1),
+        "total": round(total_s * 1000, 1),
+    }
+    return path, size, timings
+
+
+async def _stream_file(path: str, chunk_size: int = 64 * 1024):
+    # Deletes the file however the response ends (sent, client gone, error),
+    # unlike a background task, which Starlette skips when sending fails.
+    try:
+        with open(path, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+def _etag(kind: str, segments: list[dict] | None, text: str | None, language: str | None, title: str) -> str:
+    """ETag over everything that determines the rendered document.
+
+    Weak, because fpdf2 stamps each render with its creation time: two
+    renders of the same input are equivalent but not byte-identical.
+    """
+    payload = json.dumps(
+        [TEMPLATE_VERSION, kind, segments, text, language, title],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return 'W/"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison.
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates or "*" in candidates
 
 
 class PdfRequest(BaseModel):
@@ -158,24 +189,58 @@ class PdfRequest(BaseModel):
 
 
 @router.post("/video/pdf/")
-async def get_video_pdf(request: PdfRequest):
-    title = _fetch_video_title(request.video_id)
+async def get_video_pdf(
+    request: PdfRequest,
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+):
+    title = await get_video_title(request.video_id)
     filename = _safe_filename(title, request.kind, request.language)
 
     if request.kind == "transcript":
         if not request.segments:
             raise HTTPException(400, "segments required for transcript PDF")
-        pdf_bytes = _build_pdf(request.segments, title)
-    else:
-        if not request.text:
-            raise HTTPException(400, f"text required for {request.kind} PDF")
-        body = _strip_markdown(request.text) if request.kind == "summary" else request.text
-        pdf_bytes = _build_text_pdf(body, title, _VARIANT_HEADING[request.kind])
-
-    return Response(
-        content=pdf_bytes,
+    elif not request.text:
+        raise HTTPException(400, f"text required for {request.kind} PDF")
+
+    etag = _etag(request.kind, request.segments, request.text, request.language, title)
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": _content_disposition(filename),
+        "Cache-Control": "private, no-cache",
+    }
+    # The client already holds these exact bytes.
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]})
+
+    cached = _rendered.get(etag)
+    if cached is not None:
+        logger.info("pdf render kind=%s bytes=%d cache=hit", request.kind, len(cached))
+        return Response(
+            content=cached,
+            media_type="application/pdf",
+            headers={**headers, "Server-Timing": "pdf-cache;desc=hit"},
+        )
+
+    path, size, timings = await _render_in_pool(request.kind, request.segments, request.text, title)
+    logger.info(
+        "pdf render kind=%s bytes=%d render_ms=%s queue_ms=%s total_ms=%s",
+        request.kind, size, timings["render"], timings["queue"], timings["total"],
+    )
+    headers["Server-Timing"] = ", ".join(f"pdf-{name};dur={ms}" for name, ms in timings.items())
+
+    if size <= PDF_CACHE_MAX_BYTES:
+        # Small enough to keep: read it back once and serve from memory.
+        try:
+            with open(path, "rb") as f:
+                pdf_bytes = f.read()
+        finally:
+            os.unlink(path)
+        _rendered.set(etag, pdf_bytes)
+        return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+    # Streamed from disk in chunks; the temp file is removed once sent.
+    return StreamingResponse(
+        _stream_file(path),
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"'
-        },
+        headers={**headers, "Content-Length": str(size)},
     )
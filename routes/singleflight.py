@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent identical upstream calls onto one shared task.
+
+    The first caller for a key starts the work; everyone who arrives while it
+    is still running awaits the same task. Waiters are reference-counted: a
+    caller that goes away (client disconnect cancels its handler) only drops
+    its own reference, and the shared task is cancelled only once nobody is
+    left waiting on it.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def join(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Register as a waiter for `key`, starting `fn()` if nothing is in flight.
+
+        Every join() must be paired with a leave(). `fn` is only called by the
+        caller that actually starts the flight.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+        flight.waiters += 1
+        return flight.task
+
+    def leave(self, key: Hashable, task: asyncio.Task) -> None:
+        flight = self._flights.get(key)
+        if flight is None or flight.task is not task:
+            return
+        flight.waiters -= 1
+        if flight.waiters <= 0 and not task.done():
+            task.cancel()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the shared result for `key`; cancelling this caller never
+        cancels the work for the other waiters."""
+        task = self.join(key, fn)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.leave(key, task)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Nobody may be left to retrieve a failure (all waiters cancelled);
+        # mark it retrieved so asyncio doesn't log "exception never retrieved".
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+
+inflight = SingleFlight()
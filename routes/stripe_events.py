@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+import sentry_sdk
+import stripe
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from database.connection import SessionLocal
+from database.orm import StripeEvent, Subscription, User
+from dependencies.auth import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# The webhook only verifies and stores events; they are applied right after
+# the response by a background task. The sweeper retries anything that task
+# didn't finish (worker restart, Stripe or DB error) until MAX_ATTEMPTS.
+STRIPE_EVENT_SWEEP_SECONDS = float(os.getenv("STRIPE_EVENT_SWEEP_SECONDS", "60"))
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv("STRIPE_EVENT_MAX_ATTEMPTS", "5"))
+# Leave fresh events to the webhook's own background task.
+STRIPE_EVENT_SWEEP_DELAY_SECONDS = int(os.getenv("STRIPE_EVENT_SWEEP_DELAY_SECONDS", "30"))
+
+
+async def record_event(payload: dict) -> bool:
+    """Store a verified webhook event; False if this event id was seen before."""
+    stmt = (
+        insert(StripeEvent)
+        .values(id=payload["id"], type=payload["type"], payload=payload)
+        .on_conflict_do_nothing(index_elements=["id"])
+        .returning(StripeEvent.id)
+    )
+    async with SessionLocal() as db:
+        inserted = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
+    return inserted is not None
+
+
+async def _checkout_price_id(checkout_session_id: str) -> str:
+    line_items = await asyncio.to_thread(
+        stripe.checkout.Session.list_line_items, checkout_session_id, limit=1
+    )
+    return line_items.data[0].price.id if line_items.data else ""
+
+
+async def _subscription_by_stripe_id(db: AsyncSession, stripe_sub_id: str):
+    result = await db.execute(
+        select(Subscription).where(Subscription.stripe_subscription_id == stripe_sub_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _on_checkout_completed(db: AsyncSession, data_object: dict, stripe_price_id: str):
+    metadata = data_object.get("metadata") or {}
+    user_id = metadata.get("user_id")
+    if not user_id:
+        logger.warning("Checkout session missing user_id in metadata")
+        return None
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        logger.warning(f"Webhook: user {user_id} not found")
+        return None
+
+    stripe_customer_id = data_object["customer"]
+    stripe_subscription_id = data_object.get("subscription")
+
+    sub_result = await db.execute(select(Subscription).where(Subscription.user_id == user.id))
+    subscription = sub_result.scalar_one_or_none()
+
+    user.tier = "premium"
+    if not user.stripe_customer_id:
+        user.stripe_customer_id = stripe_customer_id
+    if subscription:
+        subscription.stripe_customer_id = stripe_customer_id
+        subscription.stripe_subscription_id = stripe_subscription_id
+        subscription.stripe_price_id = stripe_price_id
+        subscription.status = "active"
+    else:
+        db.add(Subscription(
+            user_id=user.id,
+            stripe_customer_id=stripe_customer_id,
+            stripe_subscription_id=stripe_subscription_id,
+            stripe_price_id=stripe_price_id,
+            status="active",
+        ))
+    logger.info(f"checkout.session.completed → user {user_id} upgraded to premium")
+    return user_id
+
+
+async def _on_subscription_updated(db: AsyncSession, data_object: dict):
+    stripe_sub_id = data_object["id"]
+    status = data_object["status"]
+
+    subscription = await _subscription_by_stripe_id(db, stripe_sub_id)
+    if not subscription:
+        logger.warning(f"subscription.updated: no row for {stripe_sub_id}")
+        return None
+
+    result = await db.execute(select(User).where(User.id == subscription.user_id))
+    user = result.scalar_one_or_none()
+
+    if status == "active":
+        subscription.status = "active"
+        if user:
+            user.tier = "premium"
+    elif status in ("canceled", "past_due", "unpaid"):
+        subscription.status = status
+        if user:
+            user.tier = "free"
+    logger.info(f"subscription.updated → {stripe_sub_id} status={status}")
+    return subscription.user_id
+
+
+async def _on_subscription_deleted(db: AsyncSession, data_object: dict):
+    stripe_sub_id = data_object["id"]
+
+    subscription = await _subscription_by_stripe_id(db, stripe_sub_id)
+    if not subscription:
+        logger.warning(f"subscription.deleted: no row for {stripe_sub_id}")
+        return None
+
+    result = await db.execute(select(User).where(User.id == subscription.user_id))
+    user = result.scalar_one_or_none()
+
+    subscription.status = "cancelled"
+    if user:
+        user.tier = "free"
+    logger.info(f"subscription.deleted → {stripe_sub_id} cancelled")
+    return subscription.user_id
+
+
+async def apply_event(event_id: str) -> None:
+    """Apply one stored event exactly once; never raises.
+
+    The event row is locked (SKIP LOCKED) for the transaction that applies
+    it and marks it processed, so a concurrent sweeper in another worker
+    skips it instead of applying it twice.
+    """
+    event_type = None
+    try:
+        async with SessionLocal() as db:
+            event = await db.get(StripeEvent, event_id)
+            if event is None or event.processed_at is not None:
+                return
+            event_type = event.type
+            data_object = event.payload["data"]["object"]
+
+        # Fetched before the row lock so no pool slot waits on Stripe.
+        price_id = await _checkout_price_id(data_object["id"]) if event_type == "checkout.session.completed" else None
+
+        async with SessionLocal() as db:
+            locked = await db.execute(
+                select(StripeEvent.id)
+                .where(StripeEvent.id == event_id, StripeEvent.processed_at.is_(None))
+                .with_for_update(skip_locked=True)
+            )
+            if locked.scalar_one_or_none() is None:
+                return  # already applied, or being applied elsewhere
+
+            if event_type == "checkout.session.completed":
+                changed_user = await _on_checkout_completed(db, data_object, price_id)
+            elif event_type == "customer.subscription.updated":
+                changed_user = await _on_subscription_updated(db, data_object)
+            elif event_type == "customer.subscription.deleted":
+                changed_user = await _on_subscription_deleted(db, data_object)
+            else:
+                changed_user = None
+
+            await db.execute(
+                update(StripeEvent)
+                .where(StripeEvent.id == event_id)
+                .values(processed_at=func.now(), attempts=StripeEvent.attempts + 1, last_error=None)
+            )
+            await db.commit()
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        logger.warning("stripe event %s (%s) failed: %s", event_id, event_type, type(e).__name__)
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(StripeEvent)
+                    .where(StripeEvent.id == event_id)
+                    .values(attempts=StripeEvent.attempts + 1, last_error=repr(e)[:1000])
+                )
+                await db.commit()
+        except Exception as record_error:
+            logger.warning("stripe event %s: could not record failure: %s", event_id, type(record_error).__name__)
+        return
+
+    if changed_user:
+        invalidate_user(changed_user)
+
+
+async def apply_pending_events(limit: int = 100) -> int:
+    """Apply stored events that are still unprocessed; returns how many were tried."""
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(StripeEvent.id)
+            .where(
+                StripeEvent.processed_at.is_(None),
+                StripeEvent.attempts < STRIPE_EVENT_MAX_ATTEMPTS,
+                StripeEvent.received_at < func.now() - timedelta(seconds=STRIPE_EVENT_SWEEP_DELAY_SECONDS),
+            )
+            .order_by(StripeEvent.received_at)
+            .limit(limit)
+        )
+        event_ids = list(result.scalars())
+    for event_id in event_ids:
+        await apply_event(event_id)
+    return len(event_ids)
+
+
+async def run_event_sweeper() -> None:
+    """Background loop for the app lifespan: retry pending events periodically."""
+    while True:
+        try:
+            await apply_pending_events()
+        except Exception as e:
+            logger.warning("stripe event sweep failed: %s", type(e).__name__)
+        await asyncio.sleep(STRIPE_EVENT_SWEEP_SECONDS)
@@ -1,21 +1,72 @@
+import hashlib
+import json
 import logging
+import os
 import sentry_sdk
-from pydantic import BaseModel
-from agents import summarize
+from pydantic import BaseModel, model_validator
+from agents import summarize, summarize_stream
+from agents.summarize_agent import model_name, needs_map_reduce, prompt_hash
 
 from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from langfuse import get_client, propagate_attributes
 from dependencies.auth import require_premium
 
+from .cache import TTLCache
+from .singleflight import inflight
+
 logger = logging.getLogger(__name__)
 langfuse = get_client()
 
 router = APIRouter()
 
+# Many users summarize the identical transcript of the same viral video.
+# Keyed by content, language, model and prompt hash, so a prompts.yaml edit
+# or model switch naturally misses.
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "256"))
+SUMMARY_CACHE_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+_summaries = TTLCache(maxsize=SUMMARY_CACHE_MAX_ENTRIES, ttl=SUMMARY_CACHE_TTL_SECONDS)
+
+
+def _summary_key(transcription: str, language: str) -> str:
+    raw = "\0".join((model_name, prompt_hash, language, transcription.strip()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def _cached_summarize(
+    transcription: str, language: str, segments: list[str] | None = None
+) -> tuple[str, bool]:
+    """Return (summary, cache_hit). Identical concurrent requests share one
+    LLM call; only successful summaries are cached."""
+    key = _summary_key(transcription, language)
+    summary = _summaries.get(key)
+    if summary is not None:
+        return summary, True
+
+    async def _generate() -> str:
+        generated = await summarize(transcription, language, segments)
+        _summaries.set(key, generated)
+        return generated
+
+    return await inflight.do(("summary", key), _generate), False
+
 
 class SummaryRequest(BaseModel):
     transcription: str
     language: str = "en"
+    # Optional merge_segments texts of the transcription; long transcripts
+    # are chunked on these boundaries for map-reduce summarization.
+    segments: list[str] | None = None
+
+    @model_validator(mode="after")
+    def _segments_match_transcription(self):
+        # Map-reduce summarizes the segments, but the cache is keyed on the
+        # transcription; they must be the same text or a request could
+        # plant an unrelated summary under someone else's transcript.
+        if self.segments is not None and " ".join(self.segments) != self.transcription:
+            raise ValueError("segments must join (with single spaces) to transcription")
+        return self
 
 
 @router.post("/video/summary")
@@ -48,16 +99,96 @@ async def create_video_summary(
             })
 
             try:
-                summary = await summarize(request.transcription, request.language)
+                summary, cache_hit = await _cached_summarize(
+                    request.transcription, request.language, request.segments
+                )
             except Exception as e:
                 sentry_sdk.capture_exception(e)
                 logger.exception("Summary generation failed")
                 span.update(level="ERROR", status_message=f"summary_failed: {type(e).__name__}")
                 raise HTTPException(status_code=502, detail="Summary service temporarily unavailable")
 
-            span.update(output={
-                "summary": summary,
-                "summary_chars": len(summary),
-            })
+            span.update(
+                output={
+                    "summary": summary,
+                    "summary_chars": len(summary),
+                },
+                metadata={
+                    "cache_hit": cache_hit,
+                    "map_reduce": needs_map_reduce(request.transcription),
+                },
+            )
 
             return {"summary": summary, "trace_id": span.trace_id}
+
+
+@router.post("/video/summary/stream")
+async def stream_video_summary(
+    request: SummaryRequest,
+    user=Depends(require_premium),
+    x_session_id: str | None = Header(None, alias="X-Session-Id"),
+):
+    """/video/summary as SSE: `delta` events carry markdown as the model
+    writes it, then the same `done`/`trace_id` (or `error`) terminal event
+    as /video/translate. Cache hits arrive as a single delta."""
+    if not request.transcription.strip():
+        logger.warning("Summary requested with no transcript text")
+        raise HTTPException(status_code=400, detail="There's no transcript text to summarize.")
+
+    async def event_generator():
+        with langfuse.start_as_current_observation(
+            name="video-summary", as_type="span"
+        ) as span:
+            attrs = {
+                "user_id": str(user.id),
+                "tags": [f"language:{request.language}", "tier:premium"],
+            }
+            if x_session_id:
+                attrs["session_id"] = x_session_id
+            with propagate_attributes(**attrs):
+                span.update(input={
+                    "transcription": request.transcription,
+                    "transcription_word_count": len(request.transcription.split()),
+                    "source_language": request.language,
+                })
+
+                key = _summary_key(request.transcription, request.language)
+                summary = _summaries.get(key)
+                cache_hit = summary is not None
+                if cache_hit:
+                    yield f"data: {json.dumps({'delta': summary})}\n\n"
+                else:
+                    parts: list[str] = []
+                    try:
+                        async for delta in summarize_stream(
+                            request.transcription, request.language, request.segments
+                        ):
+                            parts.append(delta)
+                            yield f"data: {json.dumps({'delta': delta})}\n\n"
+                    except Exception as e:
+                        sentry_sdk.capture_exception(e)
+                        logger.exception("Summary stream failed")
+                        span.update(level="ERROR", status_message=f"summary_failed: {type(e).__name__}")
+                        yield f"data: {json.dumps({'error': 'Summary service temporarily unavailable'})}\n\n"
+                        return
+                    summary = "".join(parts)
+                    _summaries.set(key, summary)
+
+                span.update(
+                    output={
+                        "summary": summary,
+                        "summary_chars": len(summary),
+                    },
+                    metadata={
+                        "cache_hit": cache_hit,
+                        "map_reduce": needs_map_reduce(request.transcription),
+                        "streamed": True,
+                    },
+                )
+                yield f"data: {json.dumps({'done': True, 'trace_id': span.trace_id})}\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
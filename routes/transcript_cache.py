@@ -0,0 +1,168 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from database.connection import SessionLocal
+from database.orm import CachedTranscript
+
+from .cache import TTLCache
+from .singleflight import inflight
+from .youtube_proxy import get_transcript_api, reset_youtube_connections, with_retries
+
+logger = logging.getLogger(__name__)
+
+# Captions for a given (video, language) practically never change, and most
+# of our traffic is repeat requests for the same viral videos — every miss
+# here is Webshare bandwidth plus another chance of being throttled.
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "512"))
+TRANSCRIPT_CACHE_TTL_SECONDS = int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+TRANSCRIPT_CACHE_DB_TTL_SECONDS = int(os.getenv("TRANSCRIPT_CACHE_DB_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+# Expired rows are never read again; writers delete them at most this often.
+TRANSCRIPT_CACHE_PRUNE_SECONDS = int(os.getenv("TRANSCRIPT_CACHE_PRUNE_SECONDS", str(60 * 60)))
+
+# The frontend calls /video/languages and then /video/ for the same video a
+# few seconds apart. Keeping the TranscriptList briefly lets the second call
+# fetch the chosen track directly instead of listing again. Kept short: the
+# caption track URLs inside it are signed and eventually expire.
+TRANSCRIPT_LIST_TTL_SECONDS = int(os.getenv("TRANSCRIPT_LIST_TTL_SECONDS", "300"))
+
+_memory = TTLCache(maxsize=TRANSCRIPT_CACHE_MAX_ENTRIES, ttl=TRANSCRIPT_CACHE_TTL_SECONDS)
+_transcript_lists = TTLCache(maxsize=256, ttl=TRANSCRIPT_LIST_TTL_SECONDS)
+_next_prune = 0.0
+
+
+def list_transcripts(video_id: str):
+    """Return the video's TranscriptList, reusing a recently listed one.
+
+    Blocking — call it from inside with_retries.
+    """
+    transcript_list = _transcript_lists.get(video_id)
+    if transcript_list is None:
+        transcript_list = get_transcript_api().list(video_id)
+        _transcript_lists.set(video_id, transcript_list)
+    return transcript_list
+
+
+def forget_transcript_list(video_id: str) -> None:
+    _transcript_lists.pop(video_id)
+
+
+async def load_transcript_list(video_id: str):
+    """Coalesced, retried list_transcripts for use from async routes."""
+    return await inflight.do(
+        ("languages", video_id),
+        lambda: with_retries(
+            lambda: list_transcripts(video_id),
+            on_transient=reset_youtube_connections,
+        ),
+    )
+
+
+async def get_cached_transcript(video_id: str, language: str, fallback: str = "none") -> dict | None:
+    """Return {"segments", "word_count", "language"} for a cached captions
+    fetch, or None. "language" is the track actually served.
+
+    Checks the in-process tier first, then Postgres (warming the in-process
+    tier on a durable hit). An entry stored for a fallback track is only
+    used when the caller allows fallback. Cache failures are logged and
+    treated as a miss — a broken cache must never fail the transcript route.
+    """
+    key = (video_id, language)
+    cached = _memory.get(key)
+    if cached is None and TRANSCRIPT_CACHE_DB_TTL_SECONDS > 0:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=TRANSCRIPT_CACHE_DB_TTL_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    select(
+                        CachedTranscript.segments,
+                        CachedTranscript.word_count,
+                        CachedTranscript.served_language,
+                    ).where(
+                        CachedTranscript.video_id == video_id,
+                        CachedTranscript.language == language,
+                        CachedTranscript.created_at >= cutoff,
+                    )
+                )
+                row = result.first()
+        except Exception as e:
+            logger.warning("transcript_cache read failed for %s/%s: %s", video_id, language, type(e).__name__)
+            return None
+        if row is not None:
+            cached = {
+                "segments": row.segments,
+                "word_count": row.word_count,
+                "language": row.served_language or language,
+            }
+            _memory.set(key, cached)
+
+    if cached is None or (cached["language"] != language and fallback != "auto"):
+        return None
+    return cached
+
+
+async def store_transcript(
+    video_id: str,
+    language: str,
+    segments: list[dict],
+    word_count: int,
+    served_language: str | None = None,
+) -> None:
+    """Write a successful captions fetch to both cache tiers (best effort).
+
+    Pass `served_language` to store a fallback result under the language
+    that was requested, so the same request hits next time.
+    """
+    served_language = served_language if served_language != language else None
+    _memory.set(
+        (video_id, language),
+        {"segments": segments, "word_count": word_count, "language": served_language or language},
+    )
+
+    if TRANSCRIPT_CACHE_DB_TTL_SECONDS <= 0:
+        return
+    stmt = insert(CachedTranscript).values(
+        video_id=video_id,
+        language=language,
+        served_language=served_language,
+        segments=segments,
+        word_count=word_count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CachedTranscript.video_id, CachedTranscript.language],
+        set_={
+            "served_language": stmt.excluded.served_language,
+            "segments": stmt.excluded.segments,
+            "word_count": stmt.excluded.word_count,
+            "created_at": datetime.now(timezone.utc),
+        },
+    )
+    try:
+        async with SessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+    except Exception as e:
+        logger.warning("transcript_cache write failed for %s/%s: %s", video_id, language, type(e).__name__)
+    await _maybe_prune()
+
+
+async def _maybe_prune() -> None:
+    """Delete rows past the durable TTL, at most once per prune interval."""
+    global _next_prune
+    now = time.monotonic()
+    if now < _next_prune:
+        return
+    _next_prune = now + TRANSCRIPT_CACHE_PRUNE_SECONDS
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=TRANSCRIPT_CACHE_DB_TTL_SECONDS)
+    try:
+        async with SessionLocal() as db:
+            result = await db.execute(delete(CachedTranscript).where(CachedTranscript.created_at < cutoff))
+            await db.commit()
+        if result.rowcount:
+            logger.info("transcript_cache pruned %d expired rows", result.rowcount)
+    except Exception as e:
+        logger.warning("transcript_cache prune failed: %s", type(e).__name__)
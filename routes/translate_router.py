@@ -1,19 +1,35 @@
+import asyncio
 import json
 import logging
+import os
 import sentry_sdk
-from typing import List
+from typing import List, Literal
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, Header
 from dependencies.auth import require_premium
 from fastapi.responses import StreamingResponse
 from langfuse import get_client, propagate_attributes
-from agents.translate_agent import translate
+from agents.translate_agent import translate_batch
+from agents.tokens import estimate_tokens
+
+from .transcript_cache import list_transcripts
+from .translation_memory import (
+    lookup_translations,
+    remember_translations,
+    translation_memory_stats,
+)
+from .utils import merge_segments
+from .youtube_proxy import reset_youtube_connections, with_retries
 
 logger = logging.getLogger(__name__)
 langfuse = get_client()
 
 router = APIRouter()
-CHUNK_SIZE = 1
+# Consecutive segments are packed into batches of roughly this many source
+# tokens (one LLM call each), and up to TRANSLATE_CONCURRENCY batches run at
+# once. A one-hour video used to be ~120 strictly sequential round trips.
+TRANSLATE_BATCH_TOKENS = int(os.getenv("TRANSLATE_BATCH_TOKENS", "1200"))
+TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "4"))
 EMPTY_TRANSCRIPT_ERROR = "There's no transcript text to translate."
 
 class Segment(BaseModel):
@@ -23,6 +39,58 @@ class Segment(BaseModel):
 class TranslateStreamRequest(BaseModel):
     segments: List[Segment]
     language: str
+    # Set for caption-sourced transcripts so YouTube's own machine
+    # translation can be tried before the LLM. mode="llm" skips it.
+    video_id: str | None = None
+    source_language: str | None = None
+    mode: Literal["auto", "llm"] = "auto"
+
+
+def _plan_batches(texts: list[str], token_budget: int) -> list[range]:
+    """Split segment indexes into consecutive runs of at most `token_budget`
+    estimated tokens. A single oversized segment still gets its own batch."""
+    batches: list[range] = []
+    start, used = 0, 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if i > start and used + tokens > token_budget:
+            batches.append(range(start, i))
+            start, used = i, 0
+        used += tokens
+    if start < len(texts):
+        batches.append(range(start, len(texts)))
+    return batches
+
+
+async def _caption_translation(video_id: str, source_language: str | None, target: str) -> list[dict] | None:
+    """Fetch YouTube's translated caption track, merged like /video/ segments.
+
+    Returns None whenever the fast path doesn't apply (no captions, track not
+    translatable to `target`, fetch failed) so the caller falls back to the LLM.
+    """
+    def _fetch():
+        transcript_list = list_transcripts(video_id)
+        if source_language:
+            track = transcript_list.find_transcript([source_language])
+        else:
+            track = next(iter(transcript_list), None)
+        if track is None or not track.is_translatable:
+            return None
+        if target not in {t.language_code for t in track.translation_languages}:
+            return None
+        return track.translate(target).fetch()
+
+    try:
+        fetched = await with_retries(_fetch, on_transient=reset_youtube_connections)
+    except Exception as e:
+        logger.info("caption translation unavailable for %s → %s: %s", video_id, target, type(e).__name__)
+        return None
+    if fetched is None:
+        return None
+    segments = merge_segments(fetched.snippets)
+    if not any(seg["text"].strip() for seg in segments):
+        return None
+    return segments
 
 @router.post("/video/translate")
 async def stream_video_translation(
@@ -80,26 +148,107 @@ async def stream_video_translation(
                     "language": request.language,
                     "segments_count": len(request.segments),
                     "source_text": source_text,
+                    "video_id": request.video_id,
+                    "mode": request.mode,
                 })
+
+                # Zero-LLM fast path: one caption fetch instead of a
+                # per-segment LLM stream, for any video YouTube can translate.
+                if request.mode == "auto" and request.video_id:
+                    caption_segments = await _caption_translation(
+                        request.video_id, request.source_language, request.language
+                    )
+                    if caption_segments:
+                        for i, seg in enumerate(caption_segments):
+                            yield f"data: {json.dumps({'translation': seg['text'], 'index': i})}\n\n"
+                        span.update(output={
+                            "engine": "youtube_captions",
+                            "chunks_completed": len(caption_segments),
+                            "translation": " ".join(seg["text"] for seg in caption_segments),
+                        })
+                        yield f"data: {json.dumps({'done': True, 'trace_id': span.trace_id})}\n\n"
+                        return
+
+                texts = [seg.text for seg in request.segments]
+                # Translation memory first: only text never translated before
+                # (with this model and prompt) reaches the LLM.
+                remembered = await lookup_translations(texts, request.language)
+                misses = [i for i, translated in enumerate(remembered) if translated is None]
+                batches = [
+                    [misses[k] for k in run]
+                    for run in _plan_batches([texts[i] for i in misses], TRANSLATE_BATCH_TOKENS)
+                ]
+                batch_of = {i: (b, k) for b, batch in enumerate(batches) for k, i in enumerate(batch)}
+                semaphore = asyncio.Semaphore(TRANSLATE_CONCURRENCY)
+                # Partial deltas from every running batch, plus a None wake-up
+                # whenever a batch finishes.
+                events: asyncio.Queue = asyncio.Queue()
+
+                async def _run(batch: list[int]) -> list[str]:
+                    batch_texts = [texts[i] for i in batch]
+                    async with semaphore:
+                        translations = await translate_batch(
+                            batch_texts,
+                            request.language,
+                            on_delta=lambda k, delta: events.put_nowait((batch[k], delta)),
+                        )
+                    await remember_translations(batch_texts, translations, request.language)
+                    return translations
+
+                # All batches are scheduled up front (at most
+                # TRANSLATE_CONCURRENCY in flight). Partial deltas are sent as
+                # soon as they arrive, tagged with their segment index; final
+                # `translation` events still go out strictly in segment order,
+                # so clients that only read those see the old protocol.
+                tasks = [asyncio.create_task(_run(batch)) for batch in batches]
+                for task in tasks:
+                    task.add_done_callback(lambda _t: events.put_nowait(None))
                 translated_chunks: list[str] = []
-                for i in range(0, len(request.segments), CHUNK_SIZE):
-                    try:
-                        chunk_segments = request.segments[i : i + CHUNK_SIZE]
-                        chunk_text = " ".join(seg.text for seg in chunk_segments)
-                        translated = await translate(chunk_text, request.language)
+                try:
+                    next_i = 0
+                    while next_i < len(texts):
+                        translated = remembered[next_i]
+                        if translated is None:
+                            b, k = batch_of[next_i]
+                            if not tasks[b].done():
+                                event = await events.get()
+                                # Deltas for segments already finalised are
+                                # stale (e.g. a batch's per-segment retry).
+                                if event is not None and event[0] >= next_i:
+                                    index, delta = event
+                                    if delta is None:
+                                        # The batch is being redone: drop
+                                        # the partial text shown so far.
+                                        yield f"data: {json.dumps({'partial': '', 'index': index, 'reset': True})}\n\n"
+                                    else:
+                                        yield f"data: {json.dumps({'partial': delta, 'index': index})}\n\n"
+                                continue
+                            try:
+                                translated = tasks[b].result()[k]
+                            except Exception as e:
+                                sentry_sdk.capture_exception(e)
+                                logger.exception("Translation batch failed")
+                                span.update(
+                                    level="ERROR",
+                                    status_message=f"batch at segment {batches[b][0]} failed: {type(e).__name__}",
+                                )
+                                yield f"data: {json.dumps({'error': 'Translation service temporarily unavailable'})}\n\n"
+                                return
                         translated_chunks.append(translated)
-                        yield f"data: {json.dumps({'translation': translated})}\n\n"
-                    except Exception as e:
-                        sentry_sdk.capture_exception(e)
-                        logger.exception("Translation chunk failed")
-                        span.update(
-                            level="ERROR",
-                            status_message=f"chunk {i} failed: {type(e).__name__}",
-                        )
-                        yield f"data: {json.dumps({'error': 'Translation service temporarily unavailable'})}\n\n"
-                        return
+                        yield f"data: {json.dumps({'translation': translated, 'index': next_i})}\n\n"
+                        next_i += 1
+                finally:
+                    # Error or client disconnect: stop paying for batches
+                    # nobody will read.
+                    for task in tasks:
+                        task.cancel()
                 span.update(output={
+                    "engine": "llm",
+                    "batches": len(batches),
                     "chunks_completed": len(translated_chunks),
+                    "memory_hits": sum(1 for i, t in enumerate(texts) if t.strip() and i not in batch_of),
+                    "memory_misses": len(misses),
+                    "memory_hit_rate_process": translation_memory_stats()["hit_rate"],
                     "translation": " ".join(translated_chunks),
                 })
                 yield f"data: {json.dumps({'done': True, 'trace_id': span.trace_id})}\n\n"
@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from agents.translate_agent import model_name, prompt_hash
+from database.connection import SessionLocal
+from database.orm import TranslationMemory
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Intros, outros, sponsor reads and repeat requests for the same video keep
+# sending identical segment text; each hit here is an LLM call not paid for.
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "20000"))
+TRANSLATION_MEMORY_TTL_SECONDS = int(os.getenv("TRANSLATION_MEMORY_TTL_SECONDS", str(24 * 60 * 60)))
+TRANSLATION_MEMORY_DB = os.getenv("TRANSLATION_MEMORY_DB", "true").lower() in ("1", "true", "yes")
+# Durable rows older than this are ignored and pruned by writers (at most
+# once per prune interval), so the table doesn't keep every segment forever.
+TRANSLATION_MEMORY_DB_TTL_SECONDS = int(os.getenv("TRANSLATION_MEMORY_DB_TTL_SECONDS", str(30 * 24 * 60 * 60)))
+TRANSLATION_MEMORY_PRUNE_SECONDS = int(os.getenv("TRANSLATION_MEMORY_PRUNE_SECONDS", str(60 * 60)))
+
+_memory = TTLCache(maxsize=TRANSLATION_MEMORY_MAX_ENTRIES, ttl=TRANSLATION_MEMORY_TTL_SECONDS)
+# Process-wide counters, per tier. The in-process TTLCache counts its own
+# hits too, but a durable hit is only known here.
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+_next_prune = 0.0
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def memory_key(text: str, language: str) -> str:
+    raw = "\0".join((model_name, prompt_hash, language, _normalize(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=TRANSLATION_MEMORY_DB_TTL_SECONDS)
+
+
+def translation_memory_stats() -> dict:
+    lookups = sum(_stats.values())
+    hits = _stats["memory_hits"] + _stats["db_hits"]
+    return {**_stats, "hit_rate": round(hits / lookups, 4) if lookups else None}
+
+
+async def lookup_translations(texts: list[str], language: str) -> list[str | None]:
+    """Return a cached translation per text, or None where there is none.
+
+    Blank texts resolve to "" without a lookup. Durable-tier failures are
+    logged and count as misses.
+    """
+    results: list[str | None] = [None] * len(texts)
+    keys: dict[str, list[int]] = {}
+    for i, text in enumerate(texts):
+        if not text.strip():
+            results[i] = ""
+            continue
+        key = memory_key(text, language)
+        cached = _memory.get(key)
+        if cached is not None:
+            results[i] = cached
+            _stats["memory_hits"] += 1
+        else:
+            keys.setdefault(key, []).append(i)
+
+    if keys and TRANSLATION_MEMORY_DB:
+        try:
+            async with SessionLocal() as db:
+                rows = await db.execute(
+                    select(TranslationMemory.key, TranslationMemory.translation).where(
+                        TranslationMemory.key.in_(list(keys)),
+                        TranslationMemory.created_at >= _cutoff(),
+                    )
+                )
+                for key, translation in rows:
+                    _memory.set(key, translation)
+                    for i in keys.pop(key):
+                        results[i] = translation
+                        _stats["db_hits"] += 1
+        except Exception as e:
+            logger.warning("translation_memory read failed: %s", type(e).__name__)
+
+    _stats["misses"] += sum(len(idxs) for idxs in keys.values())
+    return results
+
+
+async def remember_translations(texts: list[str], translations: list[str], language: str) -> None:
+    """Store fresh LLM translations in both tiers (best effort)."""
+    rows = {}
+    for text, translation in zip(texts, translations):
+        if not text.strip() or not translation.strip():
+            continue
+        key = memory_key(text, language)
+        _memory.set(key, translation)
+        rows[key] = {"key": key, "language": language, "model": model_name, "translation": translation}
+
+    if not rows or not TRANSLATION_MEMORY_DB:
+        return
+    try:
+        async with SessionLocal() as db:
+            stmt = insert(TranslationMemory).values(list(rows.values()))
+            # Refresh rows that expired but haven't been pruned yet.
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TranslationMemory.key],
+                set_={"translation": stmt.excluded.translation, "created_at": func.now()},
+                where=TranslationMemory.created_at < _cutoff(),
+            )
+            await db.execute(stmt)
+            await db.commit()
+    except Exception as e:
+        logger.warning("translation_memory write failed: %s", type(e).__name__)
+    await _maybe_prune()
+
+
+async def _maybe_prune() -> None:
+    """Delete rows past the durable TTL, at most once per prune interval."""
+    global _next_prune
+    now = time.monotonic()
+    if now < _next_prune:
+        return
+    _next_prune = now + TRANSLATION_MEMORY_PRUNE_SECONDS
+    try:
+        async with SessionLocal() as db:
+            result = await db.execute(delete(TranslationMemory).where(TranslationMemory.created_at < _cutoff()))
+            await db.commit()
+        if result.rowcount:
+            logger.info("translation_memory pruned %d expired rows", result.rowcount)
+    except Exception as e:
+        logger.warning("translation_memory prune failed: %s", type(e).__name__)
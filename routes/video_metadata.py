@@ -0,0 +1,88 @@
+import logging
+import os
+
+import httpx
+
+from .cache import TTLCache
+from .singleflight import inflight
+
+logger = logging.getLogger(__name__)
+
+# Title and channel come from YouTube's oEmbed endpoint (no API key, no
+# proxy needed). oEmbed has no duration; that is filled in whenever a
+# premium yt-dlp probe has seen the video, via record_duration().
+VIDEO_METADATA_MAX_ENTRIES = int(os.getenv("VIDEO_METADATA_MAX_ENTRIES", "2048"))
+VIDEO_METADATA_TTL_SECONDS = int(os.getenv("VIDEO_METADATA_TTL_SECONDS", str(24 * 60 * 60)))
+OEMBED_TIMEOUT_SECONDS = float(os.getenv("OEMBED_TIMEOUT_SECONDS", "5"))
+
+_OEMBED_URL = "https://www.youtube.com/oembed"
+
+_metadata = TTLCache(maxsize=VIDEO_METADATA_MAX_ENTRIES, ttl=VIDEO_METADATA_TTL_SECONDS)
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    # One pooled client per worker: repeat lookups reuse the TLS connection
+    # to youtube.com instead of a fresh handshake each time.
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=OEMBED_TIMEOUT_SECONDS,
+            headers={"User-Agent": "TubeText/1.0"},
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+def _empty() -> dict:
+    return {"title": None, "channel": None, "duration": None}
+
+
+async def _fetch_oembed(video_id: str) -> dict:
+    resp = await _get_client().get(
+        _OEMBED_URL,
+        params={"url": f"https://www.youtube.com/watch?v={video_id}", "format": "json"},
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    metadata = {**_empty(), **(_metadata.get(video_id) or {})}
+    metadata["title"] = data.get("title")
+    metadata["channel"] = data.get("author_name")
+    _metadata.set(video_id, metadata)
+    return metadata
+
+
+async def get_video_metadata(video_id: str | None) -> dict:
+    """Return {"title", "channel", "duration"} for a video; never raises.
+
+    Unknown fields are None. Failed lookups are not cached, so a transient
+    oEmbed error only costs the request that hit it.
+    """
+    if not video_id:
+        return _empty()
+    cached = _metadata.get(video_id)
+    if cached is not None and cached["title"] is not None:
+        return cached
+    try:
+        return await inflight.do(("metadata", video_id), lambda: _fetch_oembed(video_id))
+    except Exception as e:
+        logger.info("oEmbed lookup failed for %s: %s", video_id, type(e).__name__)
+        return cached or _empty()
+
+
+async def get_video_title(video_id: str | None) -> str:
+    """Video title for display, falling back to 'Transcript'."""
+    return (await get_video_metadata(video_id))["title"] or "Transcript"
+
+
+def get_cached_duration(video_id: str) -> float | None:
+    """Duration in seconds if a previous probe recorded it (no network)."""
+    cached = _metadata.get(video_id)
+    return cached["duration"] if cached else None
+
+
+def record_duration(video_id: str, duration_s: float) -> None:
+    """Remember a duration learned elsewhere (e.g. the premium yt-dlp probe)."""
+    metadata = {**_empty(), **(_metadata.get(video_id) or {})}
+    metadata["duration"] = duration_s
+    _metadata.set(video_id, metadata)
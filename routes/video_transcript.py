@@ -1,23 +1,38 @@
+import asyncio
 import logging
 import os
-from datetime import datetime, timezone
+from typing import Literal
 
 import sentry_sdk
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from itsdangerous import BadSignature, URLSafeSerializer
 from langfuse import get_client, propagate_attributes
-from sqlalchemy.ext.asyncio import AsyncSession
-from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import NoTranscriptFound
-from youtube_transcript_api.proxies import WebshareProxyConfig
 
 from agents.languages import resolve_language_name
-from database import get_db
-from dependencies.auth import get_current_user
+from database.usage import FREE_MONTHLY_LIMIT, consume_free_use, refund_free_use
+from dependencies.auth import get_current_user, invalidate_user
+from dependencies.rate_limit import RateLimiter
 
+from .singleflight import inflight
+from .language_detect import describe_languages
+from .transcript_cache import (
+    forget_transcript_list,
+    get_cached_transcript,
+    list_transcripts,
+    load_transcript_list,
+    store_transcript,
+)
 from .utils import extract_video_id, merge_segments
-from .youtube_proxy import classify_youtube_error, error_response, with_retries
+from .video_metadata import get_video_metadata
+from .youtube_proxy import (
+    USER_MESSAGES,
+    classify_youtube_error,
+    error_response,
+    reset_youtube_connections,
+    with_retries,
+)
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -29,6 +44,31 @@ router = APIRouter()
 
 serializer = URLSafeSerializer(COOKIE_SECRET_KEY)
 
+# Caps request volume per client. The anonymous quota lives in a cookie
+# that is trivially cleared, and premium users have no quota at all.
+video_limit = RateLimiter(
+    "video",
+    limit=int(os.getenv("VIDEO_RATE_LIMIT", "30")),
+    period=int(os.getenv("VIDEO_RATE_PERIOD_SECONDS", "60")),
+)
+
+# How long a response may wait on the oEmbed title lookup. Usually it's a
+# cache hit and instant; a slow lookup finishes in the background instead,
+# warming the cache for the next request.
+METADATA_WAIT_SECONDS = float(os.getenv("METADATA_WAIT_SECONDS", "0.25"))
+_background_lookups: set[asyncio.Task] = set()
+
+
+async def _metadata_within(task: asyncio.Task, timeout: float) -> dict:
+    """The lookup's result if it's ready within `timeout`, else empty fields."""
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if done:
+        return task.result()
+    # Keep a reference so the unfinished lookup isn't garbage-collected.
+    _background_lookups.add(task)
+    task.add_done_callback(_background_lookups.discard)
+    return {"title": None, "channel": None, "duration": None}
+
 
 def _no_captions_message(exc: BaseException, requested_language: str) -> str | None:
     """Build a richer no-captions message listing the languages that DO have
@@ -62,14 +102,39 @@ def _no_captions_message(exc: BaseException, requested_language: str) -> str | N
     )
 
 
-@router.post("/video/")
+def _pick_track(transcript_list, language: str, fallback: str):
+    """Choose the caption track to serve for `language`.
+
+    With fallback="auto", a miss on the exact code falls back to the same
+    base language (the normalization resolve_language_name uses, so "en-US"
+    → "en", and "en" also matches "en-GB"), then to the video's default
+    track — all from the one TranscriptList, so no extra round trip.
+    """
+    try:
+        return transcript_list.find_transcript([language])
+    except NoTranscriptFound as e:
+        if fallback != "auto":
+            raise
+        miss = e
+
+    base = language.split("-")[0]
+    for track in transcript_list:  # manual tracks iterate before generated ones
+        if track.language_code.split("-")[0] == base:
+            return track
+    default = next(iter(transcript_list), None)
+    if default is None:
+        raise miss
+    return default
+
+
+@router.post("/video/", dependencies=[Depends(video_limit)])
 async def get_video_transcript(
     request: Request,
     response: Response,
     video_url: str,
     language: str = "en",
+    fallback: Literal["none", "auto"] = "none",
     user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
 ):
     if not user:
         raw_cookie = request.cookies.get("tubetext_session")
@@ -99,23 +164,15 @@ async def get_video_transcript(
         )
 
     if user and user.tier != "premium":
-        now = datetime.now(timezone.utc)
-        if user.usage_reset_at.month != now.month or user.usage_reset_at.year != now.year:
-            user.usage_count = 0
-            user.usage_reset_at = now
-
-        limit = 20
-        if user.usage_count >= limit:
+        # One conditional UPDATE does rollover, limit check and increment.
+        used = await consume_free_use(user.id)
+        invalidate_user(user.id)
+        if used is None:
             raise HTTPException(
                 status_code=429,
-                detail=f"You've used all {limit} free transcriptions this month. Upgrade to Premium for unlimited access.",
+                detail=f"You've used all {FREE_MONTHLY_LIMIT} free transcriptions this month. Upgrade to Premium for unlimited access.",
             )
 
-        user.usage_count += 1
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-
     with langfuse.start_as_current_observation(
         name="video-transcript-free", as_type="span"
     ) as span:
@@ -138,60 +195,136 @@ async def get_video_transcript(
                 span.update(level="ERROR", status_message=f"bad_input: {type(e).__name__}")
                 return error_response(e)
 
-            def _fetch():
-                ytt_api = YouTubeTranscriptApi(
-                    proxy_config=WebshareProxyConfig(
-                        proxy_username=os.getenv("WEBSHARE_PROXY_USERNAME"),
-                        proxy_password=os.getenv("WEBSHARE_PROXY_PASSWORD"),
-                    )
-                )
-                return ytt_api.fetch(video_id, languages=[language])
+            # Title/channel lookup runs alongside the captions fetch.
+            metadata_task = asyncio.create_task(get_video_metadata(video_id))
 
-            try:
-                transcript = await with_retries(_fetch)
-            except Exception as e:
-                code = classify_youtube_error(e)
-                if code in ("no_captions", "bad_input"):
-                    # Expected outcome of user input (e.g. asking for English
-                    # captions on a Hindi-only video) — keep a log trail but
-                    # don't page Sentry. Sentry: PYTHON-FASTAPI-D.
-                    logger.info(
-                        "video_transcript %s for %s: %s", code, video_url, type(e).__name__
-                    )
-                else:
-                    sentry_sdk.capture_exception(e)
-                    logger.warning(
-                        "video_transcript failed for %s: %s", video_url, type(e).__name__
-                    )
-                span.update(level="ERROR", status_message=f"{code}: {type(e).__name__}")
-                if user and user.tier != "premium" and code == "transient":
-                    user.usage_count = max(0, user.usage_count - 1)
-                    db.add(user)
-                    await db.commit()
-                    await db.refresh(user)
-                if code == "no_captions":
-                    enriched = _no_captions_message(e, language)
-                    if enriched:
-                        return error_response(e, error=enriched)
-                return error_response(e)
+            served_language = language
+            cached = await get_cached_transcript(video_id, language, fallback)
+            if cached is not None:
+                segments = cached["segments"]
+                word_count = cached["word_count"]
+                served_language = cached["language"]
+            else:
+                def _fetch():
+                    # Reuses the TranscriptList from a just-made /video/languages
+                    # call when there is one, so this is a single round trip.
+                    track = _pick_track(list_transcripts(video_id), language, fallback)
+                    try:
+                        return track.fetch()
+                    except Exception:
+                        # Re-list on retry in case the cached track URL went stale.
+                        forget_transcript_list(video_id)
+                        raise
+
+                async def _load() -> dict:
+                    transcript = await with_retries(_fetch, on_transient=reset_youtube_connections)
+                    snippets = transcript.snippets
+                    served = transcript.language_code
+                    segments = merge_segments(snippets)
+                    word_count = sum(len(s.text.split()) for s in snippets)
+                    await store_transcript(video_id, served, segments, word_count)
+                    if served != language:
+                        # Also file it under the requested language, or every
+                        # repeat of this fallback request would miss.
+                        await store_transcript(video_id, language, segments, word_count, served_language=served)
+                    return {"segments": segments, "word_count": word_count, "language": served}
+
+                try:
+                    # Concurrent requests for the same trending video share
+                    # one proxied fetch instead of each starting their own.
+                    loaded = await inflight.do(("captions", video_id, language, fallback), _load)
+                except Exception as e:
+                    metadata_task.cancel()
+                    code = classify_youtube_error(e)
+                    if code in ("no_captions", "bad_input"):
+                        # Expected outcome of user input (e.g. asking for English
+                        # captions on a Hindi-only video) — keep a log trail but
+                        # don't page Sentry. Sentry: PYTHON-FASTAPI-D.
+                        logger.info(
+                            "video_transcript %s for %s: %s", code, video_url, type(e).__name__
+                        )
+                    else:
+                        sentry_sdk.capture_exception(e)
+                        logger.warning(
+                            "video_transcript failed for %s: %s", video_url, type(e).__name__
+                        )
+                    span.update(level="ERROR", status_message=f"{code}: {type(e).__name__}")
+                    if user and user.tier != "premium" and code == "transient":
+                        await refund_free_use(user.id)
+                        invalidate_user(user.id)
+                    if code == "no_captions":
+                        enriched = _no_captions_message(e, language)
+                        if enriched:
+                            return error_response(e, error=enriched)
+                    return error_response(e)
 
-            snippets = transcript.snippets
-            segments = merge_segments(snippets)
-            word_count = sum(len(s.text.split()) for s in snippets)
+                segments = loaded["segments"]
+                word_count = loaded["word_count"]
+                served_language = loaded["language"]
 
+            metadata = await _metadata_within(metadata_task, METADATA_WAIT_SECONDS)
             span.update(output={
                 "video_id": video_id,
                 "segments_count": len(segments),
                 "word_count": word_count,
                 "source": "captions",
+                "cache_hit": cached is not None,
+                "language": served_language,
+                "fallback_used": served_language != language,
             })
 
             return {
                 "success": True,
                 "video_id": video_id,
                 "source": "captions",
-                "language": language,
+                "language": served_language,
+                "requested_language": language,
+                "fallback_used": served_language != language,
+                "title": metadata["title"],
+                "channel": metadata["channel"],
                 "segments": segments,
                 "word_count": word_count,
                 "trace_id": span.trace_id,
             }
+
+
+@router.post("/video/with-languages", dependencies=[Depends(video_limit)])
+async def get_video_transcript_with_languages(
+    request: Request,
+    response: Response,
+    video_url: str,
+    user=Depends(get_current_user),
+):
+    """/video/languages and /video/ for the default language in one request.
+
+    The caption listing is shared with the transcript fetch, so this costs
+    one list call plus one track fetch. Quota accounting is exactly that of
+    /video/; a listing failure does not consume a free use.
+    """
+    try:
+        video_id = extract_video_id(video_url)
+    except ValueError as e:
+        return error_response(e, languages=[], default=None)
+
+    try:
+        transcript_list = await load_transcript_list(video_id)
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        logger.warning("video_transcript_with_languages failed for %s: %s", video_url, type(e).__name__)
+        return error_response(e, languages=[], default=None)
+
+    languages = describe_languages(transcript_list)
+    if not languages:
+        return {
+            "success": False,
+            "error_code": "no_captions",
+            "error": USER_MESSAGES["no_captions"],
+            "languages": [],
+            "default": None,
+        }
+
+    default = languages[0]["code"]
+    result = await get_video_transcript(
+        request, response, video_url, language=default, user=user
+    )
+    return {**result, "languages": languages, "default": default}
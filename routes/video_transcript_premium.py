@@ -12,9 +12,12 @@ from fastapi import APIRouter, Depends, Header
 from fastapi.responses import StreamingResponse
 from langfuse import get_client, propagate_attributes
 
+from .singleflight import inflight
 from .utils import extract_video_id, merge_segments
+from .video_metadata import get_cached_duration, record_duration
 from .youtube_proxy import classify_youtube_error, error_response, with_retries
 from dependencies.auth import require_premium
+from dependencies.rate_limit import RateLimiter
 
 router = APIRouter()
 load_dotenv()
@@ -23,10 +26,19 @@ langfuse = get_client()
 
 DEEPGRAM_PER_SECOND_USD = float(os.getenv("DEEPGRAM_PER_SECOND_USD", "0.0000723"))
 MAX_VIDEO_MINUTES = int(os.getenv("PREMIUM_MAX_VIDEO_MINUTES", "60"))
+# Each request can start a download plus a paid Deepgram transcription.
+premium_limit = RateLimiter(
+    "premium",
+    limit=int(os.getenv("PREMIUM_RATE_LIMIT", "10")),
+    period=int(os.getenv("PREMIUM_RATE_PERIOD_SECONDS", "600")),
+)
 # Railway's edge reaps idle connections (PREMIUM-001); events must flow
 # faster than that timeout to keep long transcriptions alive.
 HEARTBEAT_SECONDS = 5.0
 
+# Progress dict of each in-flight premium pipeline, keyed like its flight.
+_flight_progress: dict[tuple, dict] = {}
+
 
 class VideoTooLongError(Exception):
     def __init__(self, duration_minutes: float):
@@ -168,7 +180,7 @@ def _transcribe_with_deepgram(mp3_path: str, language: str) -> dict:
     }
 
 
-@router.post("/video/premium/")
+@router.post("/video/premium/", dependencies=[Depends(premium_limit)])
 async def get_video_transcript_premium(
     video_url: str,
     language: str = "en",
@@ -218,15 +230,21 @@ async def get_video_transcript_premium(
                 def _pipeline():
                     progress["stage"] = "checking"
                     progress["percent"] = None
-                    probe_opts = {
-                        "quiet": True,
-                        "no_warnings": True,
-                        "proxy": _proxy_url(),
-                        "socket_timeout": 30,
-                    }
-                    with yt_dlp.YoutubeDL(probe_opts) as ydl:
-                        info = ydl.extract_info(video_url, download=False)
-                    duration_s = info.get("duration")
+                    # A duration seen by an earlier probe skips the proxied
+                    # yt-dlp metadata round trip entirely.
+                    duration_s = get_cached_duration(video_id)
+                    if duration_s is None:
+                        probe_opts = {
+                            "quiet": True,
+                            "no_warnings": True,
+                            "proxy": _proxy_url(),
+                            "socket_timeout": 30,
+                        }
+                        with yt_dlp.YoutubeDL(probe_opts) as ydl:
+                            info = ydl.extract_info(video_url, download=False)
+                        duration_s = info.get("duration")
+                        if duration_s:
+                            record_duration(video_id, duration_s)
                     if duration_s and duration_s > MAX_VIDEO_MINUTES * 60:
                         raise VideoTooLongError(duration_s / 60)
 
@@ -258,9 +276,22 @@ async def get_video_transcript_premium(
                         mp3_file = f"{output_path}.mp3"
                         return _transcribe_with_deepgram(mp3_file, language)
 
-                task = asyncio.create_task(
-                    with_retries(_pipeline, attempts=3, backoff=(2.0, 4.0))
-                )
+                # Identical concurrent requests share one yt-dlp download and
+                # one Deepgram bill. Followers read the leader's progress dict
+                # so their heartbeats still report real stages.
+                flight_key = ("premium", video_id, language)
+
+                def _start_pipeline():
+                    _flight_progress[flight_key] = progress
+                    pipeline = asyncio.ensure_future(
+                        with_retries(_pipeline, attempts=3, backoff=(2.0, 4.0))
+                    )
+                    pipeline.add_done_callback(lambda _t: _flight_progress.pop(flight_key, None))
+                    return pipeline
+
+                shared_flight = inflight.in_flight(flight_key)
+                task = inflight.join(flight_key, _start_pipeline)
+                progress = _flight_progress.get(flight_key, progress)
                 try:
                     yield _sse({"status": dict(progress)})
                     while True:
@@ -273,7 +304,9 @@ async def get_video_transcript_premium(
                     word_count = result["word_count"]
                     duration = result["duration"]
                     model_used = result["model_used"]
-                    cost_usd = result["cost_usd"]
+                    # The Deepgram spend belongs to the request that ran the
+                    # pipeline; followers only record that they shared it.
+                    cost_usd = 0.0 if shared_flight else result["cost_usd"]
                 except VideoTooLongError as e:
                     span.update(
                         level="WARNING",
@@ -315,10 +348,10 @@ async def get_video_transcript_premium(
                     yield _sse(error_response(e))
                     return
                 finally:
-                    # Client disconnect closes this generator; don't leave the
-                    # pipeline task awaiting forever.
-                    if not task.done():
-                        task.cancel()
+                    # Client disconnect closes this generator; drop our claim on
+                    # the shared pipeline so it is cancelled once the last
+                    # waiter is gone, but keeps running for everyone else.
+                    inflight.leave(flight_key, task)
 
                 # The "deepgram-transcribe" generation observation (with real
                 # start/end timing, the winning model, and the honest total
@@ -333,6 +366,7 @@ async def get_video_transcript_premium(
                     "model": model_used,
                     "cost_usd": cost_usd,
                     "source": "audio_transcription",
+                    "shared_flight": shared_flight,
                 })
 
                 yield _sse({
@@ -1,10 +1,15 @@
 import asyncio
 import logging
+import os
 import random
 import socket
+import threading
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
 from urllib3.exceptions import MaxRetryError
+from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
     AgeRestricted,
     InvalidVideoId,
@@ -19,6 +24,7 @@ from youtube_transcript_api._errors import (
     VideoUnplayable,
     YouTubeRequestFailed,
 )
+from youtube_transcript_api.proxies import WebshareProxyConfig
 from yt_dlp.utils import (
     DownloadError,
     ExtractorError,
@@ -109,14 +115,83 @@ def classify_youtube_error(exc: BaseException) -> ErrorCode:
     return "unknown"
 
 
-async def with_retries(fn, *, attempts: int = 3, backoff=(0.5, 1.0, 2.0), jitter: float = 0.2):
-    """Run a sync callable in a worker thread; retry only on transient errors."""
+# One pooled, keep-alive client per process instead of a fresh
+# YouTubeTranscriptApi (and TCP + proxy CONNECT + TLS handshake) per call.
+# Pool size should roughly match the to_thread executor's worker count.
+YOUTUBE_HTTP_POOL_SIZE = int(os.getenv("YOUTUBE_HTTP_POOL_SIZE", "16"))
+# Webshare rotates the exit IP per connection, which is why the library sends
+# "Connection: close" by default. We keep connections alive for latency and
+# instead drop the pool whenever YouTube blocks us (see with_retries), so the
+# retry opens a fresh tunnel on a new IP. Set to "false" to restore rotation
+# on every request.
+YOUTUBE_KEEP_ALIVE = os.getenv("YOUTUBE_KEEP_ALIVE", "true").lower() in ("1", "true", "yes")
+
+_client_lock = threading.Lock()
+_transcript_api: YouTubeTranscriptApi | None = None
+_http_session: requests.Session | None = None
+
+
+def get_transcript_api() -> YouTubeTranscriptApi:
+    """Process-wide YouTubeTranscriptApi backed by a pooled requests.Session.
+
+    Safe to share across the with_retries worker threads: the client keeps no
+    per-call state beyond the session, and urllib3's pools are thread-safe.
+    """
+    global _transcript_api, _http_session
+    with _client_lock:
+        if _transcript_api is None:
+            proxy_config = WebshareProxyConfig(
+                proxy_username=os.getenv("WEBSHARE_PROXY_USERNAME"),
+                proxy_password=os.getenv("WEBSHARE_PROXY_PASSWORD"),
+            )
+            session = requests.Session()
+            api = YouTubeTranscriptApi(proxy_config=proxy_config, http_client=session)
+            # The constructor mounts unpooled default adapters and (for
+            # rotating proxies) forces Connection: close; override both.
+            if YOUTUBE_KEEP_ALIVE:
+                session.headers.pop("Connection", None)
+            adapter = HTTPAdapter(
+                pool_connections=YOUTUBE_HTTP_POOL_SIZE,
+                pool_maxsize=YOUTUBE_HTTP_POOL_SIZE,
+                max_retries=Retry(
+                    total=proxy_config.retries_when_blocked,
+                    status_forcelist=[429],
+                ),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+            _transcript_api = api
+        return _transcript_api
+
+
+def reset_youtube_connections() -> None:
+    """Drop pooled proxy connections so the next request gets a fresh exit IP."""
+    if _http_session is not None:
+        _http_session.close()
+
+
+async def with_retries(
+    fn,
+    *,
+    attempts: int = 3,
+    backoff=(0.5, 1.0, 2.0),
+    jitter: float = 0.2,
+    on_transient=None,
+):
+    """Run a sync callable in a worker thread; retry only on transient errors.
+
+    `on_transient` (sync, no args) runs before each retry — the captions
+    routes pass reset_youtube_connections so a blocked IP isn't reused.
+    """
     for i in range(attempts):
         try:
             return await asyncio.to_thread(fn)
         except BaseException as e:
             if classify_youtube_error(e) != "transient" or i == attempts - 1:
                 raise
+            if on_transient is not None:
+                on_transient()
             wait = backoff[min(i, len(backoff) - 1)] * (1 + random.uniform(-jitter, jitter))
             logger.warning(
                 "Transient YouTube error %s, retrying in %.2fs (attempt %d/%d)",